@@ -1,30 +1,80 @@
-from email.mime import text
-from math import dist
+import time
+_startup_t0 = time.perf_counter()
 import os
 import sys
 import re
-from xml.sax import handler
-from PyQt6 import QtWidgets, QtGui, QtCore
-from openai import OpenAI
-import deepl
-import requests
+import math
+import unicodedata
 import configparser
-from queue import Queue
-from threading import Thread, Event
-from PIL import Image, ImageQt
-import httpcore
-setattr(httpcore, 'SyncHTTPTransport', 'AsyncHTTPProxy')
-from googletrans import Translator
-from pynput import keyboard as pynput_keyboard
+from contextlib import contextmanager
+from queue import Queue, Empty
+from threading import Thread, Event, Lock, RLock, Condition, Timer, local
 import csv
-import time
-from packaging import version
-from concurrent.futures import ThreadPoolExecutor, thread
+import random
+from collections import OrderedDict, deque
+import heapq
+import itertools
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED, TimeoutError as FutureTimeout
 import json
-from PyQt6.QtMultimedia import QSoundEffect
+import gzip
+import bisect
+from array import array
+import tempfile
 current_version = "0.4.1"
 
 
+class StartupProfile:
+    REPORT_FILE = os.path.join(os.path.expanduser("~"), ".td2_startup_report.txt")
+
+    def __init__(self, t0):
+        self.t0 = t0
+        self.enabled = "--startup-report" in sys.argv or bool(os.environ.get("TD2_STARTUP_REPORT"))
+        self.imports = []
+        self.marks = []
+        self.startup_done = False
+        self._lock = Lock()
+
+    @contextmanager
+    def measure(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.imports.append((name, (time.perf_counter() - start) * 1000, self.startup_done))
+
+    def mark(self, name):
+        with self._lock:
+            self.marks.append((name, (time.perf_counter() - self.t0) * 1000))
+
+    def report(self):
+        lines = [f"TD2 Translator {current_version} startup report"]
+        lines.append("Imports before window:")
+        lines += [f"  {name:<34}{ms:9.1f} ms" for name, ms, deferred in self.imports if not deferred]
+        lines.append("Milestones (since process start):")
+        lines += [f"  {name:<34}{ms:9.1f} ms" for name, ms in self.marks]
+        deferred = [(name, ms) for name, ms, is_deferred in self.imports if is_deferred]
+        if deferred:
+            lines.append("Deferred imports (first use):")
+            lines += [f"  {name:<34}{ms:9.1f} ms" for name, ms in deferred]
+        return "\n".join(lines)
+
+    def write_report(self):
+        if not self.enabled:
+            return
+        text = self.report()
+        try:
+            with open(self.REPORT_FILE, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+        except OSError:
+            pass
+
+
+startup_profile = StartupProfile(_startup_t0)
+with startup_profile.measure("PyQt6"):
+    from PyQt6 import QtWidgets, QtGui, QtCore
+
+
 class TranslationDisplay(QtWidgets.QTextEdit):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -39,6 +89,162 @@ class TranslationDisplay(QtWidgets.QTextEdit):
                 return
         super().keyPressEvent(event)
 
+_line_formats = {}
+
+def line_format(line_type):
+    # Formate werden nur einmal gebaut und von Tabs und Overlay gemeinsam genutzt
+    fmt = _line_formats.get(line_type)
+    if fmt is None:
+        fmt = QtGui.QTextCharFormat()
+        if line_type == "fahrdienstleiter":
+            fmt.setForeground(QtGui.QColor("#DF7676"))
+            fmt.setFontWeight(QtGui.QFont.Weight.Bold)
+        elif line_type == "translated":
+            fmt.setForeground(QtGui.QColor("orange"))
+            fmt.setFontWeight(QtGui.QFont.Weight.Bold)
+        elif line_type == "swdr":
+            fmt.setForeground(QtGui.QColor("green"))
+            fmt.setFontWeight(QtGui.QFont.Weight.Bold)
+        elif line_type == "system":
+            fmt.setForeground(QtGui.QColor("#9E9E9E"))
+        elif line_type == "warning":
+            fmt.setForeground(QtGui.QColor("red"))
+            fmt.setFontWeight(QtGui.QFont.Weight.Bold)
+        else:
+            fmt.setForeground(QtGui.QColor("white"))
+        _line_formats[line_type] = fmt
+    return fmt
+
+def append_lines(text_edit, translated_lines):
+    cursor = QtGui.QTextCursor(text_edit.document())
+    cursor.movePosition(QtGui.QTextCursor.MoveOperation.End)
+    for line, line_type in translated_lines:
+        cursor.insertText(line + "\n", line_format(line_type))
+    text_edit.setTextCursor(cursor)
+    text_edit.ensureCursorVisible()
+
+def insert_line(text_edit, block_number, line, line_type):
+    # Vor Zeile block_number einfügen; am Ende wie append_lines, mittendrin ohne zu scrollen
+    if block_number >= text_edit.document().blockCount() - 1:
+        append_lines(text_edit, [(line, line_type)])
+        return
+    cursor = QtGui.QTextCursor(text_edit.document().findBlockByNumber(block_number))
+    cursor.insertText(line + "\n", line_format(line_type))
+
+
+class LanguageColumns(QtWidgets.QSplitter):
+    # Eine Spalte je Zielsprache; mit nur einer Sprache ohne Überschrift, also wie bisher
+    def __init__(self, make_text_edit, languages=(), parent=None):
+        super().__init__(QtCore.Qt.Orientation.Horizontal, parent)
+        self.make_text_edit = make_text_edit
+        self.text_edits = {}
+        self._columns = {}
+        self.set_languages(languages)
+
+    def set_languages(self, languages):
+        for language in [language for language in self.text_edits if language not in languages]:
+            del self.text_edits[language]
+            column, _ = self._columns.pop(language)
+            column.setParent(None)
+            column.deleteLater()
+        for index, language in enumerate(languages):
+            if language not in self.text_edits:
+                column = QtWidgets.QWidget()
+                layout = QtWidgets.QVBoxLayout(column)
+                layout.setContentsMargins(0, 0, 0, 0)
+                layout.setSpacing(0)
+                label = QtWidgets.QLabel(language)
+                text_edit = self.make_text_edit()
+                layout.addWidget(label)
+                layout.addWidget(text_edit)
+                self.text_edits[language] = text_edit
+                self._columns[language] = (column, label)
+            self.insertWidget(index, self._columns[language][0])
+        for column, label in self._columns.values():
+            label.setVisible(len(self._columns) > 1)
+
+    def append_translations(self, translations):
+        for language, lines in translations.items():
+            text_edit = self.text_edits.get(language)
+            if text_edit is not None:
+                append_lines(text_edit, lines)
+
+
+class TimelineMerger:
+    """Orders the events of several logs by log date plus chat time (hh:mm:ss).
+
+    Each log delivers its events in order, so the logs are sorted runs: the initial timeline is a
+    heapq.merge of the runs, later events are placed with bisect into the sorted key list.
+    """
+    DAY = 86400
+
+    def __init__(self, max_events):
+        self.max_events = max_events
+        self.keys = []
+        self._last = {}
+        self._seq = itertools.count()
+
+    @staticmethod
+    def log_start(log_name, fallback):
+        match = re.search(r'(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})', log_name or "")
+        if match:
+            return time.mktime(time.strptime(match.group(1), "%Y-%m-%d_%H-%M-%S"))
+        return fallback
+
+    def key(self, event):
+        last = self._last.get(event.log)
+        if last is None:
+            last = self.log_start(event.log, event.received)
+        time_match = re.search(r'\((\d{2}):(\d{2}):(\d{2})\)', event.header)
+        if time_match:
+            hours, minutes, seconds = (int(part) for part in time_match.groups())
+            midnight = time.mktime(time.localtime(last)[:3] + (0, 0, 0, 0, 0, -1))
+            value = midnight + hours * 3600 + minutes * 60 + seconds
+            # Mitternacht überschritten: die Uhrzeit springt zurück, der Tag weiter
+            if value < last - self.DAY / 2:
+                value += self.DAY
+            last = value
+        # Zeilen ohne Uhrzeit (Warnungen, manche Systemmeldungen) bleiben hinter ihrem Vorgänger
+        self._last[event.log] = last
+        return (last, next(self._seq))
+
+    def build(self, streams):
+        """Merge the recent events of all logs, returns the events in timeline order."""
+        self._last.clear()
+        merged = list(heapq.merge(*[[(self.key(event), event) for event in stream] for stream in streams],
+                                  key=lambda item: item[0]))[-self.max_events:]
+        self.keys = [key for key, _ in merged]
+        return [event for _, event in merged]
+
+    def insert(self, event):
+        """Place a new event, returns its position in the timeline."""
+        key = self.key(event)
+        position = bisect.bisect_right(self.keys, key)
+        self.keys.insert(position, key)
+        if len(self.keys) > self.max_events:
+            del self.keys[0]
+        return position
+
+
+class TimelineView(LanguageColumns):
+    # "All"-Tab: alle Logs in einer Zeitleiste, neue Zeilen werden einsortiert statt alles neu zu sortieren
+    def __init__(self, make_text_edit, languages, max_events, parent=None):
+        super().__init__(make_text_edit, languages, parent)
+        self.merger = TimelineMerger(max_events)
+
+    def rebuild(self, streams):
+        events = self.merger.build(streams)
+        for language, text_edit in self.text_edits.items():
+            text_edit.clear()
+        self.append_translations(events_to_lines(events, list(self.text_edits)))
+
+    def insert_events(self, events):
+        for event in events:
+            position = self.merger.insert(event)
+            # Das Dokument hat dieselbe Zeilengrenze und wirft die älteste Zeile selbst raus
+            for language, text_edit in self.text_edits.items():
+                insert_line(text_edit, position, event.line(language), event.kind)
+
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev und for PyInstaller """
     base_path = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
@@ -46,8 +252,249 @@ def resource_path(relative_path):
 
 config = configparser.ConfigParser()
 config.read(resource_path('config.cfg'))
-client = OpenAI(api_key=config['DEFAULT']['OPENAI_API_KEY'])
-deepl_api_key = config['DEFAULT']['deepl_api_key']
+
+def api_key(name):
+    return config['DEFAULT'].get(name, '').strip()
+
+
+class TranslationError(Exception):
+    retryable = False
+    reason = "failed"
+
+    def __init__(self, message="", service=None, status=None):
+        super().__init__(message or self.reason)
+        self.service = service
+        self.status = status
+
+    def marker(self):
+        return f"[⚠ untranslated: {self.service or 'translation'} {self.reason}]"
+
+class RateLimitedError(TranslationError):
+    retryable = True
+    reason = "rate limited"
+
+class ServiceUnavailableError(TranslationError):
+    retryable = True
+    reason = "unavailable"
+
+class QuotaExceededError(TranslationError):
+    reason = "quota exceeded"
+
+class ConfigurationError(TranslationError):
+    reason = "not configured"
+
+class CircuitOpenError(TranslationError):
+    reason = "circuit open"
+
+
+def classify_error(error, service, status=None):
+    name = type(error).__name__
+    if status == 429:
+        cls = RateLimitedError
+    elif status == 456 or "Quota" in name:
+        cls = QuotaExceededError
+    elif status in (401, 403) or "Authentication" in name or "Authorization" in name:
+        cls = ConfigurationError
+    elif (status is not None and status >= 500) or any(word in name for word in ("Timeout", "Connect", "Network")):
+        cls = ServiceUnavailableError
+    else:
+        cls = TranslationError
+    return cls(str(error), service=service, status=status)
+
+
+class Backends:
+    # SDKs werden erst beim ersten Gebrauch des jeweiligen Dienstes importiert
+    def __init__(self):
+        self._lock = Lock()
+        self._openai_client = None
+        self._deepl_translator = None
+        self._google_translator = None
+        self._local_translator = None
+
+    def openai_client(self):
+        with self._lock:
+            if self._openai_client is None:
+                with startup_profile.measure("openai"):
+                    from openai import OpenAI
+                key = api_key('OPENAI_API_KEY')
+                if not key:
+                    raise ConfigurationError("OPENAI_API_KEY missing in config.cfg", service="ChatGPT")
+                self._openai_client = OpenAI(api_key=key)
+            return self._openai_client
+
+    def deepl_translator(self):
+        with self._lock:
+            if self._deepl_translator is None:
+                with startup_profile.measure("deepl"):
+                    import deepl
+                key = api_key('deepl_api_key')
+                if not key:
+                    raise ConfigurationError("deepl_api_key missing in config.cfg", service="Deepl")
+                self._deepl_translator = deepl.Translator(key)
+            return self._deepl_translator
+
+    def google_translator(self):
+        with self._lock:
+            if self._google_translator is None:
+                with startup_profile.measure("googletrans"):
+                    import httpcore
+                    setattr(httpcore, 'SyncHTTPTransport', 'AsyncHTTPProxy')
+                    from googletrans import Translator
+                self._google_translator = Translator()
+            return self._google_translator
+
+    def local_translator(self):
+        with self._lock:
+            if self._local_translator is None:
+                self._local_translator = LocalTranslator(
+                    model_dir=config.get('local', 'model_dir', fallback='') or resource_path('models'),
+                    threads=config.getint('local', 'threads', fallback=max(1, (os.cpu_count() or 2) // 2)),
+                    compute_type=config.get('local', 'compute_type', fallback='int8'),
+                    beam_size=config.getint('local', 'beam_size', fallback=2),
+                    source_language=config.get('local', 'source_language', fallback='Polish')
+                )
+            return self._local_translator
+
+    def reset(self, service):
+        # Laufende Anfragen behalten ihren alten Client, neue bekommen einen mit dem neuen Schlüssel
+        with self._lock:
+            if service == "ChatGPT":
+                self._openai_client = None
+            elif service == "Deepl":
+                self._deepl_translator = None
+            elif service == LOCAL_SERVICE:
+                self._local_translator = None
+
+
+backends = Backends()
+
+LOCAL_SERVICE = "Local (Offline)"
+
+
+class LocalTranslator:
+    """Offline translation on the CPU with OPUS-MT (Marian) models converted for CTranslate2.
+
+    Every model is a folder opus-mt-<source>-<target> in model_dir with the converted model and the
+    source.spm/target.spm SentencePiece files. Pairs without a model go through English if both
+    halves exist (pl -> en -> de).
+    """
+    LANGUAGE_CODES = {
+        "English": "en", "American English": "en", "German": "de", "Polish": "pl", "French": "fr",
+        "Spanish": "es", "Italian": "it", "Dutch": "nl", "Czech": "cs", "Slovak": "sk", "Russian": "ru",
+        "Hungarian": "hu", "Portuguese": "pt",
+    }
+
+    def __init__(self, model_dir, threads, compute_type="int8", beam_size=2, source_language="Polish"):
+        self.model_dir = model_dir
+        self.threads = threads
+        self.compute_type = compute_type
+        self.beam_size = beam_size
+        self.source_language = source_language
+        self._models = {}
+        self._lock = Lock()
+
+    def _model(self, source, target):
+        with self._lock:
+            if (source, target) not in self._models:
+                path = os.path.join(self.model_dir, f"opus-mt-{source}-{target}")
+                model = None
+                if os.path.isdir(path):
+                    try:
+                        with startup_profile.measure("ctranslate2"):
+                            import ctranslate2
+                            import sentencepiece
+                    except ImportError as e:
+                        raise ConfigurationError("ctranslate2 and sentencepiece are needed for offline translation",
+                                                 service=LOCAL_SERVICE) from e
+                    start = time.perf_counter()
+                    # int8 halbiert Speicher und Rechenzeit gegenüber float32 bei kaum schlechterer Qualität
+                    translator = ctranslate2.Translator(path, device="cpu", compute_type=self.compute_type,
+                                                        inter_threads=1, intra_threads=self.threads)
+                    model = (translator,
+                             sentencepiece.SentencePieceProcessor(model_file=os.path.join(path, "source.spm")),
+                             sentencepiece.SentencePieceProcessor(model_file=os.path.join(path, "target.spm")))
+                    metrics.set(f"local.load_ms.{source}-{target}", round((time.perf_counter() - start) * 1000))
+                self._models[(source, target)] = model
+            return self._models[(source, target)]
+
+    def _route(self, source, target):
+        if self._model(source, target) is not None:
+            return [(source, target)]
+        if "en" not in (source, target) and self._model(source, "en") and self._model("en", target):
+            return [(source, "en"), ("en", target)]
+        raise ConfigurationError(f"No offline model for {source}->{target} in {self.model_dir}", service=LOCAL_SERVICE)
+
+    def _source(self, text):
+        detected, confidence = language_detector.detect(text)
+        if detected in self.LANGUAGE_CODES and confidence >= 0.9:
+            return self.LANGUAGE_CODES[detected]
+        return self.LANGUAGE_CODES.get(self.source_language, "pl")
+
+    def _run(self, source, target, texts):
+        translator, source_sp, target_sp = self._model(source, target)
+        tokens = [source_sp.encode(text, out_type=str) for text in texts]
+        results = translator.translate_batch(tokens, beam_size=self.beam_size, max_batch_size=32)
+        return [target_sp.decode(result.hypotheses[0]) for result in results]
+
+    def translate(self, texts, target_language):
+        target = self.LANGUAGE_CODES.get(LANGUAGE_ALIASES.get(target_language, target_language))
+        if target is None:
+            raise ConfigurationError(f"Target language '{target_language}' not supported offline", service=LOCAL_SERVICE)
+        # Ein Batch kann mehrere Ausgangssprachen enthalten, je Sprache ein Modellaufruf
+        results = list(texts)
+        by_source = {}
+        for index, text in enumerate(texts):
+            source = self._source(text)
+            if source != target:
+                by_source.setdefault(source, []).append(index)
+        for source, indexes in by_source.items():
+            batch = [texts[index] for index in indexes]
+            for step in self._route(source, target):
+                batch = self._run(*step, batch)
+            for index, translated in zip(indexes, batch):
+                results[index] = translated
+        metrics.incr("local.sentences", len(texts))
+        return results
+
+    def warm_up(self, languages):
+        # Modelle laden und einmal rechnen lassen, damit die erste echte Zeile nicht die Ladezeit trägt
+        start = time.perf_counter()
+        for language in languages:
+            self.translate(["Dzień dobry, wjazd na tor drugi."], language)
+        metrics.set("local.warm_up_ms", round((time.perf_counter() - start) * 1000))
+
+
+def warm_up_local(languages):
+    def run():
+        try:
+            backends.local_translator().warm_up(languages)
+        except TranslationError as e:
+            metrics.incr(f"errors.{LOCAL_SERVICE}.{e.reason}")
+    Thread(target=run, name="LocalWarmUp", daemon=True).start()
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = Lock()
+        self._counters = {}
+        self._values = {}
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def set(self, name, value):
+        with self._lock:
+            self._values[name] = value
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self._counters)
+            data.update(self._values)
+        return data
+
+
+metrics = Metrics()
 
 class TranslationWorker(QtCore.QObject):
     finished = QtCore.pyqtSignal(list)
@@ -60,14 +507,14 @@ class TranslationWorker(QtCore.QObject):
     def run(self):
         if self.cancelled:
             return
-        results = self.handler.translate_lines(self.lines)
+        results = self.handler.translate_events(self.lines)
         if not self.cancelled:  
             self.finished.emit(results)
 
 
 def load_ignore_list(filepath):
     with open(filepath, 'r', encoding='utf-8') as file:
-        return {line.strip() for line in file}
+        return FilterEngine([line.strip() for line in file])
 
 def load_fixed_translations(filepath):
     fixed_translations = {}
@@ -86,34 +533,1010 @@ def load_scenery_names(filepath):
     with open(filepath, 'r', encoding='utf-8') as file:
         return {line.strip() for line in file if line.strip()}
 
+def load_system_templates(filepath):
+    templates = {}
+    with open(filepath, 'r', encoding='utf-8') as file:
+        reader = csv.DictReader(line for line in file if not line.startswith('#'))
+        for row in reader:
+            template = row['template'].strip()
+            templates.setdefault(template, {})[row['language'].strip()] = row['translation'].strip()
+    return templates
+
+LANGUAGE_ALIASES = {
+    "American English": "English",
+    "Brazilian Portuguese": "Portuguese",
+}
+
+_FOLD_EXTRA = str.maketrans({"ł": "l", "Ł": "L", "ø": "o", "Ø": "O", "đ": "d", "Đ": "D"})
+
+def fold_text(text):
+    # Kleinschreibung, Diakritika weg (ą -> a, ł -> l), Satzzeichen zu Leerzeichen
+    text = unicodedata.normalize("NFKD", text.translate(_FOLD_EXTRA))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    return " ".join(re.sub(r"[^\w\s]+", " ", text).split())
+
+
+class GlossaryIndex:
+    # Vorberechneter Index aus fixed_translations.csv, Schlüssel sind normalisierte Token-Tupel
+    def __init__(self, fixed_translations, scenery_names=()):
+        self.phrases = {}
+        for text, translations in fixed_translations.items():
+            key = tuple(fold_text(text).split())
+            if key:
+                self.phrases.setdefault(key, {}).update(translations)
+        self.max_phrase_len = max((len(key) for key in self.phrases), default=0)
+        self.scenery_tokens = {fold_text(name) for name in scenery_names if " " not in name.strip()}
+
+    def lookup(self, text, language):
+        entry = self.phrases.get(tuple(fold_text(text).split()))
+        if entry:
+            return entry.get(language) or entry.get(LANGUAGE_ALIASES.get(language))
+        return None
+
+    def _is_passthrough_token(self, raw, core):
+        # Zahlen, Zugnummern, Signale, Nutzer@Namen, Sceneriennamen und reine Emotes bleiben stehen
+        return not core or "@" in raw or any(ch.isdigit() for ch in core) or core in self.scenery_tokens
+
+    def translate(self, text, language):
+        """Translate text locally if it consists only of glossary phrases, names and numbers."""
+        raw_tokens = text.split()
+        tokens = [fold_text(token).replace(" ", "") for token in raw_tokens]
+        output = []
+        matched = False
+        i = 0
+        while i < len(tokens):
+            for n in range(min(self.max_phrase_len, len(tokens) - i), 0, -1):
+                entry = self.phrases.get(tuple(tokens[i:i + n]))
+                translation = entry and (entry.get(language) or entry.get(LANGUAGE_ALIASES.get(language)))
+                if translation:
+                    trailing = re.search(r"[!?.,:;]*$", raw_tokens[i + n - 1]).group(0)
+                    output.append(translation + trailing)
+                    matched = True
+                    i += n
+                    break
+            else:
+                if not self._is_passthrough_token(raw_tokens[i], tokens[i]):
+                    return None
+                output.append(raw_tokens[i])
+                i += 1
+        return " ".join(output) if matched else None
+
+
+class TemplateEngine:
+    # Formelhafte System- und Servermeldungen, alle Vorlagen in einem einzigen Regex
+    SLOT_PATTERNS = {
+        "driver": r"\d+@[^\s:]+",
+        "user": r"[^\s:]+@[^\s:]+",
+        "number": r"\d+",
+        "signal": r"\S+",
+        "reason": r".+",
+    }
+    TRANSLATED_SLOTS = {"reason"}
+
+    def __init__(self, templates, glossary=None):
+        self.glossary = glossary
+        self.templates = []
+        alternatives = []
+        for index, (template, translations) in enumerate(templates.items()):
+            parts = re.split(r"\{(\w+)\}", template)
+            pattern = []
+            slots = []
+            for i, part in enumerate(parts):
+                if i % 2 == 0:
+                    pattern.append(re.escape(part))
+                else:
+                    slot_pattern = self.SLOT_PATTERNS.get(re.sub(r"\d+$", "", part), r".+?")
+                    pattern.append(f"(?P<t{index}_{part}>{slot_pattern})")
+                    slots.append(part)
+            alternatives.append(f"(?P<t{index}>{''.join(pattern)})")
+            self.templates.append((template, translations, slots))
+        self.pattern = re.compile("^(?:" + "|".join(alternatives) + ")$") if alternatives else None
+
+    def match(self, text):
+        match = self.pattern and self.pattern.match(text.strip())
+        if not match:
+            return None
+        index = int(match.lastgroup[1:])
+        template, translations, slots = self.templates[index]
+        return template, translations, {slot: match.group(f"t{index}_{slot}") for slot in slots}
+
+    def render(self, text, language, found=None):
+        """Render a recognized system message in the target language, None for anything else."""
+        if found is None:
+            found = self.match(text)
+        if found is None:
+            return None
+        template, translations, values = found
+        values = dict(values)
+        # Ohne Zeile für die Zielsprache bleibt der Originalsatz, nur Slots wie {reason} werden übersetzt
+        translation = translations.get(language) or translations.get(LANGUAGE_ALIASES.get(language)) or template
+        for slot in self.TRANSLATED_SLOTS & values.keys():
+            if self.glossary is not None:
+                values[slot] = self.glossary.lookup(values[slot], language) or values[slot]
+        return re.sub(r"\{(\w+)\}", lambda m: values.get(m.group(1), m.group(0)), translation)
+
+
+class FilterEngine:
+    """Pre-filter for chat messages, compiled once from the rules in ignore_list.csv.
+
+    Rule syntax (one per line, '#' starts a comment):
+      text            normalized exact match (case and diacritics ignored); rules with punctuation
+                      or only digits (":3", "o/", "07") match the stripped text, case ignored
+      prefix:text     normalized prefix match
+      re:pattern      regular expression searched in the raw message
+      class:name      numeric | emoji | short:<n>
+      pass:<rule>     show the message untranslated instead of dropping it
+    """
+
+    def __init__(self, rules):
+        self.exact = {}
+        self.literal = {}
+        self.prefixes = []
+        self.patterns = []
+        self.classes = []
+        for rule in rules:
+            if not rule or rule.startswith("#"):
+                continue
+            action, body = ("pass", rule[5:]) if rule.startswith("pass:") else ("drop", rule)
+            entry = (action, rule)
+            if body.startswith("prefix:"):
+                self.prefixes.append((self.normalize(body[7:]), entry))
+            elif body.startswith("re:"):
+                self.patterns.append((f"r{len(self.patterns)}", body[3:], entry))
+            elif body.startswith("class:"):
+                self.classes.append((body[6:].strip(), entry))
+            else:
+                key = fold_text(body)
+                if key and len(key.replace(" ", "")) == len("".join(body.split())) and not key.isdigit():
+                    self.exact.setdefault(key, entry)
+                else:
+                    # Gefaltet würde ":3" zu "3" und "o/" zu "o" und träfe echte Antworten wie "Tor 3"
+                    self.literal.setdefault(body.strip().casefold(), entry)
+        self.prefix_tuple = tuple(prefix for prefix, _ in self.prefixes)
+        # Alle Regex-Regeln als eine Alternation, der Gruppenname verrät die Regel
+        self.pattern = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern, _ in self.patterns)) if self.patterns else None
+        self.pattern_rules = {name: entry for name, _, entry in self.patterns}
+
+    @staticmethod
+    def normalize(text):
+        return fold_text(text) or text.strip()
+
+    def _char_class(self, message, norm, name):
+        letters = sum(ch.isalpha() for ch in message)
+        digits = sum(ch.isdigit() for ch in message)
+        if name == "numeric":
+            return letters == 0 and digits > 0
+        if name == "emoji":
+            return letters == 0 and digits == 0
+        if name.startswith("short:"):
+            return len(norm) < int(name[6:])
+        return False
+
+    def _match(self, message):
+        entry = self.literal.get(message.strip().casefold())
+        if entry:
+            return entry
+        norm = self.normalize(message)
+        entry = self.exact.get(norm)
+        if entry:
+            return entry
+        if self.prefix_tuple and norm.startswith(self.prefix_tuple):
+            for prefix, entry in self.prefixes:
+                if norm.startswith(prefix):
+                    return entry
+        if self.pattern:
+            match = self.pattern.search(message)
+            if match:
+                return self.pattern_rules[match.lastgroup]
+        for name, entry in self.classes:
+            if self._char_class(message, norm, name):
+                return entry
+        return None
+
+    def check(self, message):
+        """Return None to translate, "drop" to hide or "pass" to show the message untranslated."""
+        entry = self._match(message)
+        if entry is None:
+            return None
+        action, rule = entry
+        metrics.incr(f"filter.{action}: {rule}")
+        return action
+
+
+class TranslationMemory:
+    # Merkt sich (Quelle, Übersetzung)-Paare und findet auch Nachrichten, die sich nur in
+    # Zugnummern, Signalen oder Namen unterscheiden ("195991 Alles klar" ~ "38111 Alles klar")
+    def __init__(self, scenery_tokens=(), max_entries=200000):
+        self.scenery_tokens = set(scenery_tokens)
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self._lock = Lock()
+
+    def _analyse(self, text):
+        skeleton, variables = [], []
+        for raw in text.split():
+            core = fold_text(raw).replace(" ", "")
+            if not core:
+                # Emoticons und reine Satzzeichen ("++", ":)", "?") gehören zum Sinn der Nachricht
+                skeleton.append(raw)
+                continue
+            # Frage oder Ausruf bleibt im Schlüssel: "Tor wolny?" ist nicht "Tor wolny!"
+            mark = "".join(ch for ch in "?!" if ch in raw)
+            word = raw.lstrip("\"'(").rstrip(".,;:\"')?!")
+            if "@" in raw or any(ch.isdigit() for ch in core) or core in self.scenery_tokens:
+                variables.append(raw.strip("!?.,:;"))
+                skeleton.append("#" + mark)
+            elif word.replace("-", "").isalnum():
+                skeleton.append(core + mark)
+            else:
+                # Emoticons mit Buchstaben (":D", "o/") nicht auf den Buchstaben reduzieren
+                skeleton.append(raw.casefold())
+        if all(token.startswith("#") for token in skeleton):
+            return None, variables
+        return " ".join(skeleton), variables
+
+    @staticmethod
+    def _substitute(translation, old_variables, new_variables):
+        if len(old_variables) != len(new_variables):
+            return None
+        mapping = {}
+        for old, new in zip(old_variables, new_variables):
+            if old != new and mapping.setdefault(old, new) != new:
+                # Derselbe alte Wert müsste zu zwei neuen werden: nicht raten
+                return None
+        if not mapping:
+            return translation
+        # Ein Durchlauf, damit ein neuer Wert nie von einer späteren Ersetzung erfasst wird
+        pattern = re.compile(r"(?<!\w)(?:" + "|".join(map(re.escape, sorted(mapping, key=len, reverse=True))) + r")(?!\w)")
+        found = set()
+
+        def replace(match):
+            found.add(match.group(0))
+            return mapping[match.group(0)]
+
+        translation = pattern.sub(replace, translation)
+        return translation if len(found) == len(mapping) else None
+
+    def lookup(self, text, language):
+        skeleton, variables = self._analyse(text)
+        if skeleton is None:
+            return None
+        with self._lock:
+            key = (language, skeleton)
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+        result = self._substitute(entry[1], entry[0], variables)
+        if result is not None:
+            metrics.incr("saved.memory_exact" if entry[0] == variables else "saved.memory_substituted")
+        return result
+
+    def store(self, text, language, translation):
+        skeleton, variables = self._analyse(text)
+        if skeleton is None:
+            return
+        key = (language, skeleton)
+        with self._lock:
+            self.entries[key] = (variables, translation)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            metrics.set("memory.entries", len(self.entries))
+
+
+class LanguageDetector:
+    # Neutrale Textproben je Sprache (gleicher Inhalt in allen Sprachen), daraus werden Zeichen-Trigramm-Profile gebaut
+    SAMPLES = {
+        "English": "The train was late this morning because a signal in front of the station had failed. We waited "
+                   "on the platform for almost half an hour before the driver explained what had happened. After "
+                   "that everything went well, and we reached the next town just before noon. I think the weather "
+                   "was the biggest problem, since heavy rain had flooded part of the line. Could you tell me when "
+                   "the next train leaves? I would like to get home before it gets dark. Thank you very much for "
+                   "your help, and have a nice evening. My brother works as a dispatcher and often says that the "
+                   "hardest part is keeping everyone informed when something goes wrong. He checks the times, talks "
+                   "to the drivers and decides which train may enter the station first. Hello everyone, how are you "
+                   "today? I am fine, thanks. Yes, I understand, no problem. Please wait a moment, I will be right "
+                   "back. Where are you going now? We can meet at the station later. Sorry, I did not see your "
+                   "message. Good night and see you tomorrow.",
+        "German": "Der Zug hatte heute Morgen Verspätung, weil ein Signal vor dem Bahnhof ausgefallen war. Wir haben"
+                  " fast eine halbe Stunde am Bahnsteig gewartet, bevor der Lokführer uns erklärt hat, was passiert "
+                  "ist. Danach lief alles gut, und wir sind kurz vor Mittag in der nächsten Stadt angekommen. Ich "
+                  "glaube, das Wetter war das größte Problem, denn der starke Regen hatte einen Teil der Strecke "
+                  "überflutet. Können Sie mir sagen, wann der nächste Zug fährt? Ich möchte gern nach Hause kommen, "
+                  "bevor es dunkel wird. Vielen Dank für Ihre Hilfe und einen schönen Abend noch. Mein Bruder "
+                  "arbeitet als Fahrdienstleiter und sagt oft, dass es am schwierigsten ist, alle auf dem Laufenden "
+                  "zu halten, wenn etwas schiefgeht. Er prüft die Zeiten, spricht mit den Fahrern und entscheidet, "
+                  "welcher Zug zuerst in den Bahnhof einfahren darf. Hallo zusammen, wie geht es euch heute? Mir "
+                  "geht es gut, danke. Ja, ich verstehe, alles in Ordnung. Bitte warte einen Moment, ich bin gleich "
+                  "zurück. Wohin fährst du jetzt? Wir können uns später am Bahnhof treffen. Entschuldigung, ich habe"
+                  " deine Nachricht nicht gesehen. Gute Nacht und bis morgen.",
+        "Polish": "Pociąg miał dziś rano opóźnienie, ponieważ przed stacją zepsuł się semafor. Czekaliśmy na peronie"
+                  " prawie pół godziny, zanim maszynista wyjaśnił nam, co się stało. Potem wszystko poszło dobrze i "
+                  "dotarliśmy do następnego miasta tuż przed południem. Myślę, że największym problemem była pogoda,"
+                  " bo silny deszcz zalał część linii. Czy może mi pan powiedzieć, kiedy odjeżdża następny pociąg? "
+                  "Chciałbym wrócić do domu, zanim się ściemni. Bardzo dziękuję za pomoc i życzę miłego wieczoru. "
+                  "Mój brat pracuje jako dyżurny ruchu i często mówi, że najtrudniej jest informować wszystkich, "
+                  "kiedy coś idzie nie tak. Sprawdza godziny, rozmawia z maszynistami i decyduje, który pociąg może "
+                  "pierwszy wjechać na stację. Cześć wszystkim, jak się dzisiaj macie? U mnie wszystko dobrze, "
+                  "dzięki. Tak, rozumiem, nie ma problemu. Poczekaj chwilę, zaraz wracam. Dokąd teraz jedziesz? "
+                  "Możemy spotkać się później na stacji. Przepraszam, nie widziałem twojej wiadomości. Dobranoc i do"
+                  " jutra.",
+        "Czech": "Vlak měl dnes ráno zpoždění, protože se před nádražím porouchalo návěstidlo. Čekali jsme na "
+                 "nástupišti skoro půl hodiny, než nám strojvedoucí vysvětlil, co se stalo. Potom už všechno šlo "
+                 "dobře a do dalšího města jsme dorazili těsně před polednem. Myslím, že největším problémem bylo "
+                 "počasí, protože silný déšť zaplavil část trati. Můžete mi říct, kdy jede další vlak? Chtěl bych se"
+                 " dostat domů, než se setmí. Moc děkuji za pomoc a přeji hezký večer. Můj bratr pracuje jako "
+                 "výpravčí a často říká, že nejtěžší je držet všechny v obraze, když se něco pokazí. Kontroluje "
+                 "časy, mluví se strojvedoucími a rozhoduje, který vlak smí vjet do stanice jako první. Ahoj "
+                 "všichni, jak se dnes máte? Mám se dobře, díky. Ano, rozumím, žádný problém. Počkej chvilku, hned "
+                 "jsem zpátky. Kam teď jedeš? Můžeme se potkat později na nádraží. Promiň, neviděl jsem tvou zprávu."
+                 " Dobrou noc a uvidíme se zítra.",
+        "Slovak": "Vlak mal dnes ráno meškanie, pretože sa pred stanicou pokazilo návestidlo. Čakali sme na "
+                  "nástupišti takmer pol hodiny, kým nám rušňovodič vysvetlil, čo sa stalo. Potom už všetko išlo "
+                  "dobre a do ďalšieho mesta sme prišli tesne pred poludním. Myslím si, že najväčším problémom bolo "
+                  "počasie, pretože silný dážď zaplavil časť trate. Môžete mi povedať, kedy ide ďalší vlak? Chcel by"
+                  " som sa dostať domov skôr, ako sa zotmie. Veľmi pekne ďakujem za pomoc a prajem pekný večer. Môj "
+                  "brat pracuje ako výpravca a často hovorí, že najťažšie je informovať všetkých, keď sa niečo "
+                  "pokazí. Kontroluje časy, rozpráva sa s rušňovodičmi a rozhoduje, ktorý vlak smie vojsť do stanice"
+                  " ako prvý. Ahoj všetci, ako sa dnes máte? Mám sa dobre, vďaka. Áno, rozumiem, žiadny problém. "
+                  "Počkaj chvíľu, hneď som späť. Kam teraz ideš? Môžeme sa stretnúť neskôr na stanici. Prepáč, "
+                  "nevidel som tvoju správu. Dobrú noc a uvidíme sa zajtra.",
+        "French": "Le train avait du retard ce matin, parce qu'un signal devant la gare était en panne. Nous avons "
+                  "attendu sur le quai presque une demi-heure avant que le conducteur nous explique ce qui s'était "
+                  "passé. Ensuite tout s'est bien passé et nous sommes arrivés dans la ville suivante juste avant "
+                  "midi. Je pense que le temps était le plus grand problème, car une forte pluie avait inondé une "
+                  "partie de la ligne. Pouvez-vous me dire quand part le prochain train ? Je voudrais rentrer chez "
+                  "moi avant la nuit. Merci beaucoup pour votre aide et bonne soirée. Mon frère travaille comme "
+                  "aiguilleur et il dit souvent que le plus difficile est de tenir tout le monde informé quand "
+                  "quelque chose ne va pas. Il vérifie les heures, parle avec les conducteurs et décide quel train "
+                  "peut entrer en gare le premier. Bonjour à tous, comment allez-vous aujourd'hui ? Je vais bien, "
+                  "merci. Oui, je comprends, pas de problème. Attends un instant, je reviens tout de suite. Où vas-"
+                  "tu maintenant ? On peut se retrouver à la gare plus tard. Désolé, je n'ai pas vu ton message. "
+                  "Bonne nuit et à demain.",
+        "Spanish": "El tren llegó tarde esta mañana porque una señal delante de la estación se había averiado. "
+                   "Esperamos en el andén casi media hora antes de que el maquinista nos explicara lo que había "
+                   "pasado. Después todo fue bien y llegamos a la siguiente ciudad justo antes del mediodía. Creo "
+                   "que el mayor problema fue el tiempo, porque una lluvia fuerte había inundado parte de la línea. "
+                   "¿Puede decirme cuándo sale el próximo tren? Me gustaría llegar a casa antes de que anochezca. "
+                   "Muchas gracias por su ayuda y que tenga una buena tarde. Mi hermano trabaja como jefe de "
+                   "circulación y dice a menudo que lo más difícil es mantener a todos informados cuando algo sale "
+                   "mal. Revisa las horas, habla con los maquinistas y decide qué tren puede entrar primero en la "
+                   "estación. Hola a todos, ¿cómo estáis hoy? Yo estoy bien, gracias. Sí, entiendo, no hay problema."
+                   " Espera un momento, vuelvo enseguida. ¿Adónde vas ahora? Podemos vernos más tarde en la "
+                   "estación. Perdona, no he visto tu mensaje. Buenas noches y hasta mañana.",
+        "Italian": "Il treno stamattina era in ritardo perché un segnale davanti alla stazione si era guastato. "
+                   "Abbiamo aspettato sul binario quasi mezz'ora prima che il macchinista ci spiegasse cosa era "
+                   "successo. Dopo è andato tutto bene e siamo arrivati nella città successiva poco prima di "
+                   "mezzogiorno. Penso che il problema più grande fosse il tempo, perché una forte pioggia aveva "
+                   "allagato una parte della linea. Può dirmi quando parte il prossimo treno? Vorrei tornare a casa "
+                   "prima che faccia buio. Grazie mille per l'aiuto e buona serata. Mio fratello lavora come "
+                   "capostazione e dice spesso che la cosa più difficile è tenere tutti informati quando qualcosa va"
+                   " storto. Controlla gli orari, parla con i macchinisti e decide quale treno può entrare per primo"
+                   " in stazione. Ciao a tutti, come state oggi? Io sto bene, grazie. Sì, capisco, nessun problema. "
+                   "Aspetta un momento, torno subito. Dove vai adesso? Possiamo vederci più tardi in stazione. "
+                   "Scusa, non ho visto il tuo messaggio. Buonanotte e a domani.",
+        "Dutch": "De trein had vanochtend vertraging, omdat een sein voor het station kapot was. We hebben bijna een"
+                 " half uur op het perron gewacht voordat de machinist ons uitlegde wat er was gebeurd. Daarna ging "
+                 "alles goed en kwamen we net voor de middag in de volgende stad aan. Ik denk dat het weer het "
+                 "grootste probleem was, want zware regen had een deel van het spoor onder water gezet. Kunt u mij "
+                 "zeggen wanneer de volgende trein vertrekt? Ik wil graag thuis zijn voordat het donker wordt. "
+                 "Hartelijk dank voor uw hulp en nog een fijne avond. Mijn broer werkt als treindienstleider en zegt"
+                 " vaak dat het moeilijkste is om iedereen op de hoogte te houden als er iets misgaat. Hij "
+                 "controleert de tijden, praat met de machinisten en beslist welke trein als eerste het station in "
+                 "mag rijden. Hallo allemaal, hoe gaat het vandaag met jullie? Met mij gaat het goed, dank je. Ja, "
+                 "ik begrijp het, geen probleem. Wacht even, ik ben zo terug. Waar ga je nu naartoe? We kunnen "
+                 "elkaar later op het station zien. Sorry, ik had je bericht niet gezien. Goede nacht en tot morgen.",
+        "Portuguese": "O comboio chegou atrasado esta manhã porque um sinal em frente da estação avariou. Esperámos "
+                      "na plataforma quase meia hora antes de o maquinista nos explicar o que tinha acontecido. "
+                      "Depois correu tudo bem e chegámos à cidade seguinte pouco antes do meio-dia. Acho que o maior"
+                      " problema foi o tempo, porque uma chuva forte tinha inundado parte da linha. Pode dizer-me "
+                      "quando parte o próximo trem? Gostaria de chegar a casa antes de escurecer. Muito obrigado "
+                      "pela ajuda e tenha uma boa noite. O meu irmão trabalha como controlador de tráfego e diz "
+                      "muitas vezes que o mais difícil é manter todos informados quando alguma coisa corre mal. Ele "
+                      "verifica os horários, fala com os maquinistas e decide qual comboio pode entrar primeiro na "
+                      "estação. Olá a todos, como estão hoje? Eu estou bem, obrigado. Sim, eu entendo, não há "
+                      "problema. Espera um momento, já volto. Para onde vais agora? Podemos encontrar-nos mais tarde"
+                      " na estação. Desculpa, não vi a tua mensagem. Boa noite e até amanhã.",
+        "Hungarian": "A vonat ma reggel késett, mert az állomás előtt elromlott egy jelző. Majdnem fél órát vártunk "
+                     "a peronon, mielőtt a mozdonyvezető elmagyarázta, mi történt. Utána minden rendben ment, és "
+                     "valamivel dél előtt megérkeztünk a következő városba. Szerintem az időjárás volt a legnagyobb "
+                     "gond, mert az erős eső elárasztotta a vonal egy részét. Meg tudná mondani, mikor indul a "
+                     "következő vonat? Szeretnék hazaérni, mielőtt besötétedik. Köszönöm szépen a segítséget, és "
+                     "további szép estét. A bátyám forgalmi szolgálattevőként dolgozik, és gyakran mondja, hogy az a"
+                     " legnehezebb, hogy mindenkit tájékoztasson, ha valami elromlik. Ellenőrzi az időpontokat, "
+                     "beszél a mozdonyvezetőkkel, és eldönti, melyik vonat járhat be elsőként az állomásra. "
+                     "Sziasztok, hogy vagytok ma? Jól vagyok, köszönöm. Igen, értem, semmi gond. Várj egy "
+                     "pillanatot, mindjárt jövök. Hová mész most? Később találkozhatunk az állomáson. Bocsánat, nem "
+                     "láttam az üzenetedet. Jó éjszakát és holnap találkozunk.",
+        "Russian": "Поезд сегодня утром опоздал, потому что перед станцией сломался светофор. Мы ждали на платформе "
+                   "почти полчаса, прежде чем машинист объяснил нам, что случилось. Потом всё прошло хорошо, и мы "
+                   "приехали в следующий город незадолго до полудня. Думаю, главной проблемой была погода, потому "
+                   "что сильный дождь затопил часть линии. Скажите, пожалуйста, когда отправляется следующий поезд? "
+                   "Я хотел бы вернуться домой до темноты. Большое спасибо за помощь и хорошего вечера. Мой брат "
+                   "работает дежурным по станции и часто говорит, что самое трудное — держать всех в курсе, когда "
+                   "что-то идёт не так. Он проверяет время, разговаривает с машинистами и решает, какой поезд первым"
+                   " войдёт на станцию. Всем привет, как у вас дела сегодня? У меня всё хорошо, спасибо. Да, "
+                   "понимаю, никаких проблем. Подожди минутку, я сейчас вернусь. Куда ты сейчас едешь? Мы можем "
+                   "встретиться позже на станции. Извини, я не видел твоё сообщение. Спокойной ночи и до завтра.",
+    }
+    def __init__(self, samples=SAMPLES):
+        self.profiles = {}
+        self.totals = {}
+        vocabulary = set()
+        for language, sample in samples.items():
+            counts = {}
+            for gram in self._trigrams(sample):
+                counts[gram] = counts.get(gram, 0) + 1
+            self.profiles[language] = counts
+            self.totals[language] = sum(counts.values())
+            vocabulary.update(counts)
+        self.vocabulary_size = len(vocabulary) + 1
+
+    @staticmethod
+    def _trigrams(text):
+        words = re.findall(r"[^\W\d_]+", text.lower())
+        for word in words:
+            padded = f" {word} "
+            for i in range(len(padded) - 2):
+                yield padded[i:i + 3]
+
+    def detect(self, text):
+        grams = list(self._trigrams(text))
+        if not grams:
+            return None, 0.0
+        scores = {}
+        for language, counts in self.profiles.items():
+            denominator = self.totals[language] + self.vocabulary_size
+            score = 0.0
+            for gram in grams:
+                score += math.log((counts.get(gram, 0) + 1) / denominator)
+            scores[language] = score
+        # Log-Wahrscheinlichkeiten in eine Konfidenz (Softmax) umrechnen
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        total = sum(math.exp(score - top) for score in scores.values())
+        return best, 1.0 / total
+
+    def is_language(self, text, language, threshold, min_letters=8):
+        language = LANGUAGE_ALIASES.get(language, language)
+        if language not in self.profiles:
+            return False
+        if sum(ch.isalpha() for ch in text) < min_letters:
+            return False
+        detected, confidence = self.detect(text)
+        return detected == language and confidence >= threshold
+
+
+language_detector = LanguageDetector()
+
+
+def is_already_in_target_language(text, target_language):
+    if not config.getboolean('language_detection', 'enabled', fallback=True):
+        return False
+    threshold = config.getfloat('language_detection', 'threshold', fallback=0.99)
+    min_letters = config.getint('language_detection', 'min_letters', fallback=8)
+    if language_detector.is_language(text, target_language, threshold, min_letters):
+        metrics.incr("saved.language_detection")
+        return True
+    return False
+
+
+class ChatEvent:
+    # Eine verarbeitete Chatzeile mit Übersetzung je Zielsprache, für Tabs, Overlay und Headless-Feed
+    __slots__ = ("kind", "header", "message", "translations", "log", "service", "latency_ms", "received")
+
+    def __init__(self, kind, header, message, translations, log="", service=None, latency_ms=None, received=None):
+        self.kind = kind
+        self.header = header
+        self.message = message
+        self.translations = translations
+        self.log = log
+        self.service = service
+        self.latency_ms = latency_ms
+        self.received = time.time() if received is None else received
+
+    def fields(self):
+        # Reihenfolge wie im Konstruktor, ChatEvent(*event.fields()) ergibt wieder dasselbe Event
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["kind"], data.get("header", ""), data["message"], data.get("translations", {}),
+                   data.get("log", ""), data.get("service"), data.get("latency_ms"), data.get("received"))
+
+    def line(self, language):
+        text = self.translations.get(language, self.message)
+        if self.kind == "warning":
+            return text
+        if self.kind == "system":
+            return f"{self.header} {text}".lstrip()
+        return f"{self.header}: {text}"
+
+    def to_dict(self):
+        time_match = re.match(r'^.*?\((\d{2}:\d{2}:\d{2})\) ?(.*)$', self.header)
+        sender = (time_match.group(2) if time_match else self.header) or None
+        # Fahrdienstleiter schreiben als "Kürzel@Name", SWDR als "[Name (Szenerie)]"
+        scenery = None
+        if self.kind == "fahrdienstleiter" and sender:
+            scenery = sender.split("@")[0]
+        elif self.kind == "swdr":
+            scenery_match = re.search(r'\(([^()]*)\)\]$', self.header)
+            scenery = scenery_match.group(1) if scenery_match else None
+        return {
+            "kind": self.kind,
+            "time": time_match.group(1) if time_match else None,
+            "sender": sender,
+            "scenery": scenery,
+            "header": self.header,
+            "message": self.message,
+            "translations": self.translations,
+            "log": self.log,
+            "service": self.service,
+            "latency_ms": self.latency_ms,
+            "received": self.received,
+        }
+
+
+def events_to_lines(events, languages):
+    translated = {language: [] for language in languages}
+    for event in events:
+        for language in languages:
+            translated[language].append((event.line(language), event.kind))
+    return translated
+
+
+ARCHIVE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".td2_translator_archive")
+ARCHIVE_SUFFIX = ".jsonl.gz"
+
+def archive_directory():
+    return config.get('archive', 'directory', fallback='') or ARCHIVE_DIRECTORY
+
+
+class SessionArchive:
+    """Append-only archive of one session.
+
+    Events are written as JSON lines in gzip members, one member per flush, so the file stays a valid
+    gzip stream after a crash. The .idx file next to it holds one line per member
+    (offset, length, first event number, count, time) for random access.
+    """
+
+    def __init__(self, path, flush_events=200, flush_interval=5.0):
+        self.path = path
+        self.session = os.path.basename(path)[:-len(ARCHIVE_SUFFIX)]
+        self.index_path = path[:-len(ARCHIVE_SUFFIX)] + ".idx"
+        self.flush_events = flush_events
+        self.flush_interval = flush_interval
+        self._count = 0
+        self._queue = Queue()
+        self._thread = Thread(target=self._write_loop, name="ArchiveWriter", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def new_session(cls, session):
+        directory = archive_directory()
+        os.makedirs(directory, exist_ok=True)
+        return cls(
+            os.path.join(directory, session + ARCHIVE_SUFFIX),
+            flush_events=config.getint('archive', 'flush_events', fallback=200),
+            flush_interval=config.getint('archive', 'flush_ms', fallback=5000) / 1000
+        )
+
+    def append(self, events):
+        # Nur einreihen, Serialisieren, Komprimieren und Schreiben macht der Writer-Thread
+        self._queue.put(list(events))
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def _write_loop(self):
+        batch = []
+        deadline = None
+        while True:
+            try:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                events = self._queue.get(timeout=timeout)
+            except Empty:
+                events = []
+            if events is None:
+                break
+            if events and not batch:
+                deadline = time.monotonic() + self.flush_interval
+            batch.extend(events)
+            if batch and (len(batch) >= self.flush_events or time.monotonic() >= deadline):
+                self._flush(batch)
+                batch = []
+                deadline = None
+        if batch:
+            self._flush(batch)
+
+    def _flush(self, batch):
+        payload = "".join(json.dumps(event.to_dict(), ensure_ascii=False) + "\n" for event in batch)
+        member = gzip.compress(payload.encode("utf-8"), mtime=0)
+        try:
+            with open(self.path, "ab") as f:
+                offset = f.tell()
+                f.write(member)
+            # Index erst nach dem Member: ein Indexeintrag zeigt nie auf unvollständige Daten
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps([offset, len(member), self._count, len(batch), batch[0].received]) + "\n")
+        except OSError:
+            metrics.incr("archive.errors")
+            return
+        self._count += len(batch)
+        metrics.incr("archive.events", len(batch))
+        metrics.set("archive.bytes", offset + len(member))
+
+
+class ArchiveReader:
+    """Reads a session archive written by SessionArchive, using the .idx file to seek to single members."""
+
+    def __init__(self, path):
+        self.path = path
+        self.members = []
+        index_path = path[:-len(ARCHIVE_SUFFIX)] + ".idx"
+        if os.path.exists(index_path):
+            with open(index_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self.members.append(json.loads(line))
+                    except ValueError:
+                        # Abgebrochene letzte Zeile
+                        break
+        self.starts = [first for _, _, first, _, _ in self.members]
+
+    def __len__(self):
+        if not self.members:
+            return 0
+        _, _, first, count, _ = self.members[-1]
+        return first + count
+
+    def _read_member(self, f, offset, length):
+        f.seek(offset)
+        return [ChatEvent.from_dict(json.loads(line)) for line in gzip.decompress(f.read(length)).decode("utf-8").splitlines()]
+
+    def events(self, start=0, stop=None):
+        """Events start..stop-1 of the session, only the members that contain them are decompressed."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return []
+        result = []
+        with open(self.path, "rb") as f:
+            for i in range(bisect.bisect_right(self.starts, start) - 1, len(self.members)):
+                offset, length, first, count, _ = self.members[i]
+                if first >= stop:
+                    break
+                events = self._read_member(f, offset, length)
+                result.extend(events[max(0, start - first):stop - first])
+        return result
+
+    def event(self, number):
+        events = self.events(number, number + 1)
+        if not events:
+            raise IndexError(number)
+        return events[0]
+
+    @staticmethod
+    def sessions():
+        directory = archive_directory()
+        if not os.path.isdir(directory):
+            return []
+        return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(ARCHIVE_SUFFIX))
+
+
+class HistoryStore:
+    """Compact in-memory history of the events of this session, used to rebuild the All tab.
+
+    Numbers, kinds and interned sender/scenery/log ids live in arrays, all texts of an event in one
+    UTF-8 record of a shared arena. Above the memory budget the oldest quarter is dropped for good
+    and unused strings are released; the session archive, if enabled, keeps every event.
+    """
+    KINDS = ("translated", "fahrdienstleiter", "swdr", "system", "warning")
+    SEPARATOR = "\0"
+
+    STRING_COLUMNS = ("senders", "sceneries", "logs", "services")
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.first = 0
+        self.received = array('d')
+        self.latency = array('f')
+        self.kinds = array('B')
+        self.senders = array('I')
+        self.sceneries = array('I')
+        self.logs = array('I')
+        self.services = array('I')
+        self.offsets = array('Q')
+        self.arena = bytearray()
+        self.strings = [""]
+        self._string_ids = {"": 0}
+        self._strings_bytes = sys.getsizeof("")
+        self._lock = Lock()
+
+    def intern(self, text):
+        text = text or ""
+        string_id = self._string_ids.get(text)
+        if string_id is None:
+            string_id = self._string_ids[text] = len(self.strings)
+            self.strings.append(text)
+            self._strings_bytes += sys.getsizeof(text)
+        return string_id
+
+    def __len__(self):
+        return self.first + len(self.kinds)
+
+    def append(self, events):
+        with self._lock:
+            for event in events:
+                data = event.to_dict()
+                self.received.append(event.received)
+                self.latency.append(-1.0 if event.latency_ms is None else event.latency_ms)
+                self.kinds.append(self.KINDS.index(event.kind) if event.kind in self.KINDS else 0)
+                self.senders.append(self.intern(data["sender"]))
+                self.sceneries.append(self.intern(data["scenery"]))
+                self.logs.append(self.intern(event.log))
+                self.services.append(self.intern(event.service))
+                self.offsets.append(len(self.arena))
+                parts = [event.header, event.message]
+                for language, translation in event.translations.items():
+                    parts += [language, translation]
+                self.arena += self.SEPARATOR.join(parts).encode("utf-8")
+            if self.memory_bytes() > self.budget_bytes:
+                self._evict(max(1, len(self.kinds) // 4))
+            self._report()
+
+    def memory_bytes(self):
+        columns = (self.received, self.latency, self.kinds, self.senders, self.sceneries, self.logs, self.services, self.offsets)
+        return len(self.arena) + sum(column.itemsize * len(column) for column in columns) + self._strings_bytes
+
+    def _evict(self, count):
+        cut = self.offsets[count] if count < len(self.offsets) else len(self.arena)
+        del self.arena[:cut]
+        self.offsets = array('Q', (offset - cut for offset in self.offsets[count:]))
+        for column in (self.received, self.latency, self.kinds, self.senders, self.sceneries, self.logs, self.services):
+            del column[:count]
+        self.first += count
+        self._compact_strings()
+        metrics.incr("history.evicted", count)
+
+    def _compact_strings(self):
+        # Sonst wächst die String-Tabelle mit jedem neuen Namen und löst bei jedem append erneut Eviction aus
+        used = {0}
+        for name in self.STRING_COLUMNS:
+            used.update(getattr(self, name))
+        if len(used) == len(self.strings):
+            return
+        remap = {old: new for new, old in enumerate(sorted(used))}
+        self.strings = [self.strings[old] for old in sorted(used)]
+        for name in self.STRING_COLUMNS:
+            setattr(self, name, array('I', (remap[string_id] for string_id in getattr(self, name))))
+        self._string_ids = {text: string_id for string_id, text in enumerate(self.strings)}
+        self._strings_bytes = sum(sys.getsizeof(text) for text in self.strings)
+
+    def _report(self):
+        in_memory = len(self.kinds)
+        metrics.set("history.messages", in_memory)
+        metrics.set("history.bytes", self.memory_bytes())
+        if in_memory:
+            metrics.set("history.bytes_per_message", round(self.memory_bytes() / in_memory, 1))
+
+    def _event(self, index):
+        end = self.offsets[index + 1] if index + 1 < len(self.offsets) else len(self.arena)
+        header, message, *translations = self.arena[self.offsets[index]:end].decode("utf-8").split(self.SEPARATOR)
+        latency = self.latency[index]
+        return ChatEvent(self.KINDS[self.kinds[index]], header, message, dict(zip(translations[::2], translations[1::2])),
+                         self.strings[self.logs[index]], self.strings[self.services[index]] or None,
+                         None if latency < 0 else round(latency, 1), self.received[index])
+
+    def recent(self, log, count):
+        """The last count events of one log that are still in memory."""
+        with self._lock:
+            log_id = self._string_ids.get(log)
+            if log_id is None:
+                return []
+            indexes = []
+            for index in range(len(self.logs) - 1, -1, -1):
+                if self.logs[index] == log_id:
+                    indexes.append(index)
+                    if len(indexes) == count:
+                        break
+            return [self._event(index) for index in reversed(indexes)]
+
+
+def new_session_name():
+    return "session_" + time.strftime("%Y-%m-%d_%H-%M-%S")
+
+
+class SearchIndex:
+    """Full-text search over originals and translations of all sessions.
+
+    SQLite with an FTS5 table over the folded text (plain LIKE if the SQLite build has no FTS5).
+    New events are written by a writer thread; archived sessions that are missing from the index
+    are added when it starts.
+    """
+    KINDS = ("fahrdienstleiter", "swdr", "translated", "system", "warning")
+
+    def __init__(self, path, current_session=None):
+        self.path = path
+        self.current_session = current_session
+        connection = self._connect()
+        connection.executescript("""
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY, session TEXT, received REAL, kind TEXT, header TEXT,
+                sender TEXT, sender_key TEXT, scenery TEXT, scenery_key TEXT, log TEXT,
+                message TEXT, translations TEXT, search_text TEXT);
+            CREATE INDEX IF NOT EXISTS messages_received ON messages(received);
+            CREATE TABLE IF NOT EXISTS sessions (session TEXT PRIMARY KEY, events INTEGER);
+        """)
+        try:
+            connection.execute("CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+                               "search_text, content='messages', content_rowid='id', prefix='2 3')")
+            self.fts = True
+        except Exception:
+            self.fts = False
+        connection.commit()
+        self._reader = connection
+        self._queue = Queue()
+        self._thread = Thread(target=self._write_loop, name="SearchIndexWriter", daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        import sqlite3
+        connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    @staticmethod
+    def _key(text):
+        return fold_text(text or "").lower()
+
+    def add(self, session, events):
+        self._queue.put((session, list(events)))
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        self._reader.close()
+
+    def _write_loop(self):
+        connection = self._connect()
+        try:
+            self._catch_up(connection)
+        except Exception:
+            metrics.incr("search.errors")
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            # Was sich inzwischen angesammelt hat, in derselben Transaktion schreiben
+            while not self._queue.empty():
+                item = self._queue.get()
+                if item is None:
+                    break
+                batch.append(item)
+            try:
+                with connection:
+                    for session, events in batch:
+                        self._insert(connection, session, events)
+            except Exception:
+                metrics.incr("search.errors")
+            if item is None:
+                break
+        connection.close()
+
+    def _catch_up(self, connection):
+        indexed = dict(connection.execute("SELECT session, events FROM sessions"))
+        for path in ArchiveReader.sessions():
+            reader = ArchiveReader(path)
+            session = os.path.basename(path)[:-len(ARCHIVE_SUFFIX)]
+            if session == self.current_session or len(reader) <= indexed.get(session, 0):
+                continue
+            with connection:
+                self._insert(connection, session, reader.events(indexed.get(session, 0)))
+
+    def _insert(self, connection, session, events):
+        rows = []
+        for event in events:
+            data = event.to_dict()
+            search_text = self._key(" ".join([event.message, *event.translations.values()]))
+            rows.append((session, event.received, event.kind, event.header, data["sender"], self._key(data["sender"]),
+                         data["scenery"], self._key(data["scenery"]), event.log, event.message,
+                         json.dumps(event.translations, ensure_ascii=False), search_text))
+        for row in rows:
+            cursor = connection.execute(
+                "INSERT INTO messages (session, received, kind, header, sender, sender_key, scenery, scenery_key, "
+                "log, message, translations, search_text) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+            if self.fts:
+                connection.execute("INSERT INTO messages_fts (rowid, search_text) VALUES (?, ?)",
+                                   (cursor.lastrowid, row[-1]))
+        connection.execute("INSERT INTO sessions (session, events) VALUES (?, ?) "
+                           "ON CONFLICT(session) DO UPDATE SET events = events + excluded.events", (session, len(rows)))
+        metrics.incr("search.indexed", len(rows))
+
+    def search(self, text="", sender="", scenery="", kind=None, since=None, until=None, limit=200):
+        """Most recently indexed matches first, as (session, ChatEvent) pairs."""
+        start = time.perf_counter()
+        conditions, params = [], []
+        tokens = re.findall(r'\w+', self._key(text))
+        source, order = "messages m", "m.id"
+        if tokens and self.fts:
+            # Nur das letzte Wort als Präfix, das wird gerade noch getippt
+            source, order = "messages_fts f JOIN messages m ON m.id = f.rowid", "f.rowid"
+            conditions.append("messages_fts MATCH ?")
+            params.append(" ".join(f'"{token}"' for token in tokens) + "*")
+        else:
+            for token in tokens:
+                conditions.append("m.search_text LIKE ?")
+                params.append(f"%{token}%")
+        if sender:
+            conditions.append("m.sender_key LIKE ?")
+            params.append(f"%{self._key(sender)}%")
+        if scenery:
+            conditions.append("m.scenery_key LIKE ?")
+            params.append(f"%{self._key(scenery)}%")
+        if kind:
+            conditions.append("m.kind = ?")
+            params.append(kind)
+        if since is not None:
+            conditions.append("m.received >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("m.received < ?")
+            params.append(until)
+        # Nach id statt Zeit sortieren: entspricht der Einfügereihenfolge, und FTS5 liefert die Treffer direkt
+        # absteigend, SQLite kann nach LIMIT Treffern aufhören
+        query = (f"SELECT m.session, m.kind, m.header, m.message, m.translations, m.log, m.received FROM {source}"
+                 + (" WHERE " + " AND ".join(conditions) if conditions else "")
+                 + f" ORDER BY {order} DESC LIMIT ?")
+        results = []
+        for session, kind, header, message, translations, log, received in self._reader.execute(query, params + [limit]):
+            results.append((session, ChatEvent(kind, header, message, json.loads(translations), log, received=received)))
+        metrics.set("search.query_ms", round((time.perf_counter() - start) * 1000, 1))
+        return results
+
+
 class LogHandler(QtCore.QObject):
     lines_translated = QtCore.pyqtSignal(list)
     play_warning_sound = QtCore.pyqtSignal()
+    _warning_sound = None
 
-    def __init__(self, log_file_path, language_var, service_var, ignore_list, fixed_translations, scenery_names,enable_driver_warning):
+    def __init__(self, log_file_path, language_var, service_var, filter_engine, engine, enable_driver_warning, my_names=()):
         super().__init__()
         self.log_file_path = log_file_path
         self.file = open(log_file_path, 'r', encoding='utf-8')
         self.language_var = language_var
         self.service_var = service_var
-        self.ignore_list = ignore_list
-        self.fixed_translations = fixed_translations
-        self.scenery_names = scenery_names
-        self.translator = Translator()
-        self.deepl_translator = deepl.Translator(deepl_api_key)
+        self.filter_engine = filter_engine
+        self.engine = engine
         self.last_position = self.file.tell()
         self.stop_event = Event()
-        self.openai_client = OpenAI(api_key=config['DEFAULT']['OPENAI_API_KEY'])
-        self.warning_sound = QSoundEffect()
-        self.warning_sound.setSource(QtCore.QUrl.fromLocalFile(resource_path("res/timer_alarm.wav")))
-        self.warning_sound.setLoopCount(1)
-        self.warning_sound.setVolume(0.8)  # Lautstärke von 0.0 bis 1.0
-        self.play_warning_sound.connect(self.warning_sound.play)
+        self.play_warning_sound.connect(self._play_warning_sound)
         self.warned_drivers = set()
         self.enable_driver_warning = enable_driver_warning
+        self.my_names = my_names
+
+    @QtCore.pyqtSlot()
+    def _play_warning_sound(self):
+        LogHandler.play_sound()
+
+    @staticmethod
+    def play_sound():
+        # QtMultimedia wird erst bei der ersten Warnung geladen
+        if LogHandler._warning_sound is None:
+            with startup_profile.measure("PyQt6.QtMultimedia"):
+                from PyQt6.QtMultimedia import QSoundEffect
+            sound = QSoundEffect(QtCore.QCoreApplication.instance())
+            sound.setSource(QtCore.QUrl.fromLocalFile(resource_path("res/timer_alarm.wav")))
+            sound.setLoopCount(1)
+            sound.setVolume(0.8)  # Lautstärke von 0.0 bis 1.0
+            LogHandler._warning_sound = sound
+        LogHandler._warning_sound.play()
 
     def get_driver_distance(self, name):
         try:
+            import requests
             url = f"https://stacjownik.spythere.eu/api/getDriverInfo?name={name}"
             resp = requests.get(url, timeout=5)
             if resp.status_code == 200:
@@ -139,6 +1562,11 @@ class LogHandler(QtCore.QObject):
             return re.sub(r'<.*?>', '', chat_message.group(1))
         return ""
 
+    def close(self):
+        self.stop_event.set()
+        if self.file:
+            self.file.close()
+
     def check_new_lines(self):
         if self.stop_event.is_set() or not self.file:
             return
@@ -148,107 +1576,929 @@ class LogHandler(QtCore.QObject):
             line = self.file.readline()
             if not line:
                 break
-            if "ChatMessage:" in line and self.contains_time(line):
+            if "ChatMessage:" in line:
                 clean_line = self.clean_chat_message(line)
-                if clean_line:
+                # Systemmeldungen ohne Zeitstempel (z. B. "left. Reason: ...") nur, wenn eine Vorlage passt
+                if clean_line and (self.contains_time(line) or self.engine.templates.match(clean_line)):
                     lines.append(clean_line)
         if lines:
             self.last_position = self.file.tell()
             self.lines_translated.emit(lines)
 
+    def warn_about_driver(self, driver_name, warnings):
+        if not hasattr(self, "_driver_cache"):
+            self._driver_cache = {}
+
+        if driver_name not in self._driver_cache:
+            self._driver_cache[driver_name] = self.get_driver_distance(driver_name)
+
+        dist = self._driver_cache.get(driver_name)
+
+        # --- NEU: Warnlogik nur mit Fahrername ---
+        if self.enable_driver_warning():
+            # Warnen bei unbekannter Distanz (None) ODER < 100, nur einmal pro Fahrer
+            if (dist is None or (isinstance(dist, (int, float)) and dist < 100)) and driver_name not in self.warned_drivers:
+                warning = f"ATTENTION: DRIVER {driver_name} drove less than 100 KM, be careful!"
+                warnings.append((warning, "warning"))
+                self.play_warning_sound.emit()
+                self.warned_drivers.add(driver_name)
+
+    def target_languages(self):
+        languages = self.language_var() if callable(self.language_var) else self.language_var
+        return [languages] if isinstance(languages, str) else list(languages)
+
     def translate_lines(self, lines):
-        translated_lines = []
-        max_workers = 1 if (self.service_var() if callable(self.service_var) else self.service_var) == "Google Translate" else 4
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_line = {}
-            for line in lines:
-                match_fd = re.search(r'^(.*?)\((\d{2}:\d{2}:\d{2})\) ([A-Za-zĄĆĘŁŃÓŚŹŻąćęłńóśźż].*?@[^: ]+)(: | )(.*)$', line)
-                match_player = re.search(r'^(.*?)\((\d{2}:\d{2}:\d{2})\) (\d+@[^: ]+)(: | )(.*)$', line)
-                match_swdr = re.search(r'^(.*?)\((\d{2}:\d{2}:\d{2})\) \[(.*? \((.*?)\))\] (.*)$', line)
-                if match_fd:
-                    timestamp_user, message = match_fd.group(1) + "(" + match_fd.group(2) + ") " + match_fd.group(3), match_fd.group(5).strip()
-                    tag = "fahrdienstleiter"
-                elif match_player:
-                    timestamp_user, message = match_player.group(1) + "(" + match_player.group(2) + ") " + match_player.group(3), match_player.group(5).strip()
-                    tag = "translated"
-                elif match_swdr:
-                    timestamp_user, message = match_swdr.group(1) + "(" + match_swdr.group(2) + ") [" + match_swdr.group(3) + "]", match_swdr.group(5).strip()
-                    tag = "swdr"
+        """Translate new chat lines into every target language, returns {language: [(line, type), ...]}."""
+        languages = self.target_languages()
+        return events_to_lines(self.translate_events(lines, languages), languages)
+
+    def translate_events(self, lines, languages=None):
+        """Parse, filter and translate new chat lines, returns a list of ChatEvents."""
+        warnings = []
+        # Die tatsächliche Parallelität pro Dienst regelt service_limits, die Reihenfolge translation_scheduler
+        my_names = self.my_names() if callable(self.my_names) else self.my_names
+        languages = languages or self.target_languages()
+        translation_service = self.service_var() if callable(self.service_var) else self.service_var
+        # Parsen, Filtern und Fahrerwarnung einmal pro Zeile, übersetzt wird je Zielsprache
+        entries = []
+        for line in lines:
+            system = re.match(r'^(.*?\(\d{2}:\d{2}:\d{2}\) )?(.*)$', line)
+            prefix, body = system.group(1) or "", system.group(2)
+            found = self.engine.templates.match(body)
+            if found is not None:
+                # Systemmeldung: lokal aus der Vorlage, ohne API-Aufruf
+                if self.filter_engine.check(body) == "drop":
+                    continue
+                metrics.incr("saved.templates", len(languages))
+                usage.record(UsageLedger.SAVED, requests=len(languages), characters=len(body) * len(languages))
+                driver_match = re.search(r'\d+@([^\s:]+)', body)
+                if driver_match:
+                    self.warn_about_driver(driver_match.group(1), warnings)
+                futures = {}
+                for language in languages:
+                    started = time.perf_counter()
+                    rendered = self.engine.templates.render(body, language, found)
+                    futures[language] = Future()
+                    futures[language].set_result((rendered, "Template", round((time.perf_counter() - started) * 1000, 1)))
+                entries.append((prefix.rstrip(), "system", body, futures))
+                continue
+            match_fd = re.search(r'^(.*?)\((\d{2}:\d{2}:\d{2})\) ([A-Za-zĄĆĘŁŃÓŚŹŻąćęłńóśźż].*?@[^: ]+)(: | )(.*)$', line)
+            match_player = re.search(r'^(.*?)\((\d{2}:\d{2}:\d{2})\) (\d+@[^: ]+)(: | )(.*)$', line)
+            match_swdr = re.search(r'^(.*?)\((\d{2}:\d{2}:\d{2})\) \[(.*? \((.*?)\))\] (.*)$', line)
+            if match_fd:
+                timestamp_user, message = match_fd.group(1) + "(" + match_fd.group(2) + ") " + match_fd.group(3), match_fd.group(5).strip()
+                tag = "fahrdienstleiter"
+            elif match_player:
+                timestamp_user, message = match_player.group(1) + "(" + match_player.group(2) + ") " + match_player.group(3), match_player.group(5).strip()
+                tag = "translated"
+            elif match_swdr:
+                timestamp_user, message = match_swdr.group(1) + "(" + match_swdr.group(2) + ") [" + match_swdr.group(3) + "]", match_swdr.group(5).strip()
+                tag = "swdr"
+            else:
+                continue
+            verdict = self.filter_engine.check(message)
+            if verdict == "drop":
+                continue
+
+            username_match = re.search(r'@([^\s:]+)', timestamp_user)
+            if username_match:
+                self.warn_about_driver(username_match.group(1), warnings)
+
+            futures = {}
+            for language in languages:
+                if verdict == "pass":
+                    futures[language] = Future()
+                    futures[language].set_result((message, "Skipped", 0.0))
                 else:
+                    priority = message_priority(tag, message, my_names)
+                    futures[language] = translation_scheduler.submit(priority, self.timed_translate, message, language, translation_service)
+            entries.append((timestamp_user, tag, message, futures))
+
+        log_name = os.path.basename(self.log_file_path)
+        events = [ChatEvent("warning", "", warning, {}, log_name) for warning, _ in warnings]
+        for timestamp_user, tag, message, futures in entries:
+            translations = {language: self.result_text(tag, message, future) for language, future in futures.items()}
+            # Quelle und Latenz der Antwort für die Hauptsprache, nicht des ganzen Stapels
+            service, latency_ms = self.answer_source(futures[languages[0]], translation_service)
+            events.append(ChatEvent(tag, timestamp_user, message, translations, log_name, service, latency_ms))
+        return events
+
+    def timed_translate(self, message, language, translation_service):
+        started = time.perf_counter()
+        translation, source = self.engine.translate_with_source(message, language, translation_service)
+        return translation, source, round((time.perf_counter() - started) * 1000, 1)
+
+    @staticmethod
+    def answer_source(future, translation_service):
+        try:
+            _, source, latency_ms = future.result()
+        except TranslationError:
+            return translation_service, None
+        return source, latency_ms
+
+    @staticmethod
+    def result_text(tag, message, future):
+        try:
+            translation = future.result()[0]
+        except TranslationError as e:
+            # Originaltext mit Markierung statt Fehlermeldung als "Übersetzung"
+            return f"{message} {e.marker()}"
+        if tag == "system":
+            return translation
+        return re.sub(r'【[^】]*】', '', translation).strip()
+
+_task_context = local()
+
+def current_priority():
+    # -1 = interaktiv (z.B. Live Translation), läuft vor allen Chat-Klassen
+    return getattr(_task_context, "priority", -1)
+
+def run_with_priority(priority, fn, *args):
+    _task_context.priority = priority
+    try:
+        return fn(*args)
+    finally:
+        _task_context.priority = -1
+
+
+PRIORITY_CLASSES = {"fahrdienstleiter": "dispatcher", "swdr": "swdr", "translated": "player"}
+
+def message_priority(tag, message, my_names=()):
+    order = [name.strip() for name in config.get('priority', 'order', fallback='dispatcher, mention, swdr, player').split(',')]
+    def rank(cls):
+        return order.index(cls) if cls in order else len(order)
+    priority = rank(PRIORITY_CLASSES.get(tag, "player"))
+    if my_names and set(re.findall(r"\w+", message.casefold())) & my_names:
+        priority = min(priority, rank("mention"))
+    return priority
+
+
+class PriorityExecutor:
+    # Gemeinsame Warteschlange für alle Tabs: kleinere Priorität wird zuerst bearbeitet
+    def __init__(self, max_workers, name="Translate"):
+        self.max_workers = max_workers
+        self.name = name
+        self._queue = []
+        self._seq = itertools.count()
+        self._cond = Condition()
+        self._workers = []
+        self._active = 0
+
+    def pending(self):
+        # Wartende plus gerade laufende Aufgaben
+        with self._cond:
+            return len(self._queue) + self._active
+
+    def submit(self, priority, fn, *args):
+        future = Future()
+        with self._cond:
+            heapq.heappush(self._queue, (priority, next(self._seq), future, fn, args))
+            metrics.set("scheduler.pending", len(self._queue))
+            if len(self._workers) < self.max_workers:
+                worker = Thread(target=self._work, name=f"{self.name}-{len(self._workers)}", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+            self._cond.notify()
+        return future
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                priority, _, future, fn, args = heapq.heappop(self._queue)
+                metrics.set("scheduler.pending", len(self._queue))
+                self._active += 1
+            try:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(run_with_priority(priority, fn, *args))
+                except BaseException as e:
+                    future.set_exception(e)
+            finally:
+                with self._cond:
+                    self._active -= 1
+
+
+translation_scheduler = PriorityExecutor(max_workers=16)
+
+
+def error_status(error):
+    # HTTP-Status aus den Exceptions der verschiedenen SDKs herausziehen
+    for attr in ("status_code", "http_status_code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    value = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(value, int):
+        return value
+    name = type(error).__name__
+    if "TooManyRequests" in name or "RateLimit" in name:
+        return 429
+    if "QuotaExceeded" in name:
+        return 456
+    return None
+
+
+class ServiceLimiter:
+    # Token-Bucket für die Anfragerate plus AIMD-gesteuerte Parallelität
+    def __init__(self, name, rate, burst, initial_concurrency, max_concurrency, min_concurrency=1):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.limit = float(initial_concurrency)
+        self.tokens = float(burst)
+        self.in_flight = 0
+        self.latency = None
+        self.best_latency = None
+        self.samples = deque(maxlen=200)
+        self._last_refill = time.monotonic()
+        self._cond = Condition()
+        self._waiters = []
+        self._seq = itertools.count()
+        self._publish()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self):
+        # Wartende nach Priorität ordnen, nur der vorderste darf den nächsten Slot nehmen
+        ticket = (current_priority(), next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    self._refill()
+                    if self._waiters[0] == ticket and self.in_flight < int(self.limit) and self.tokens >= 1:
+                        self.tokens -= 1
+                        self.in_flight += 1
+                        self._publish()
+                        return time.monotonic()
+                    # Auf freien Slot (notify) oder den nächsten Token warten
+                    at_head = self._waiters[0] == ticket
+                    wait = (1 - self.tokens) / self.rate if at_head and self.in_flight < int(self.limit) else None
+                    self._cond.wait(wait)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def release(self, started, failed=False, status=None):
+        latency = time.monotonic() - started
+        with self._cond:
+            self.in_flight -= 1
+            if status == 429 or (status is not None and status >= 500):
+                # Multiplikativ zurück bei Drosselung oder Serverfehlern
+                self.limit = max(self.min_concurrency, self.limit / 2)
+                self.tokens = 0.0
+                metrics.incr(f"limits.{self.name}.backoffs")
+            elif not failed:
+                self.samples.append(latency)
+                self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+                self.best_latency = latency if self.best_latency is None else min(self.best_latency, self.latency)
+                # Additiv hoch, solange die Latenz gesund bleibt (~ +1 pro Fenster)
+                if self.latency <= 2 * self.best_latency:
+                    self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self._publish()
+            self._cond.notify_all()
+
+    def percentile(self, fraction, min_samples=20):
+        with self._cond:
+            samples = sorted(self.samples)
+        if len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+    def _publish(self):
+        metrics.set(f"limits.{self.name}.concurrency", int(self.limit))
+        metrics.set(f"limits.{self.name}.in_flight", self.in_flight)
+        metrics.set(f"limits.{self.name}.rate_per_s", float(self.rate))
+        if self.latency is not None:
+            metrics.set(f"limits.{self.name}.latency_ms", self.latency * 1000)
+
+
+class ServiceLimits:
+    # Standardwerte je Dienst, überschreibbar in config.cfg über [limits.<Dienst>]
+    # oder speziell für einen Schlüssel über [limits.<Dienst>.<letzte 4 Zeichen des Keys>]
+    DEFAULTS = {
+        "ChatGPT": dict(rate=3.0, burst=5, initial_concurrency=4, max_concurrency=8),
+        "Deepl": dict(rate=5.0, burst=10, initial_concurrency=4, max_concurrency=10),
+        "Deepl Free": dict(rate=2.0, burst=4, initial_concurrency=2, max_concurrency=4),
+        "Google Translate": dict(rate=2.0, burst=2, initial_concurrency=1, max_concurrency=2),
+        # Lokal rechnet ein Batch auf allen Threads, parallele Aufrufe würden sich nur die CPU teilen
+        LOCAL_SERVICE: dict(rate=100.0, burst=100, initial_concurrency=1, max_concurrency=1),
+    }
+    KEY_NAMES = {"ChatGPT": "OPENAI_API_KEY", "Deepl": "deepl_api_key"}
+
+    def __init__(self):
+        self._lock = Lock()
+        self._limiters = {}
+
+    def get(self, service):
+        key = api_key(self.KEY_NAMES[service]) if service in self.KEY_NAMES else ""
+        with self._lock:
+            limiter = self._limiters.get((service, key))
+            if limiter is None:
+                limiter = ServiceLimiter(service, **self._settings(service, key))
+                self._limiters[(service, key)] = limiter
+            return limiter
+
+    def _settings(self, service, key):
+        defaults = "Deepl Free" if service == "Deepl" and key.endswith(":fx") else service
+        settings = dict(self.DEFAULTS.get(defaults, dict(rate=2.0, burst=2, initial_concurrency=1, max_concurrency=4)))
+        sections = [f"limits.{service}"] + ([f"limits.{service}.{key[-4:]}"] if key else [])
+        for section in sections:
+            for name in ("rate", "burst", "initial_concurrency", "max_concurrency"):
+                if config.has_option(section, name):
+                    settings[name] = config.getfloat(section, name)
+        settings["burst"] = max(1, settings["burst"])
+        return settings
+
+
+service_limits = ServiceLimits()
+
+
+class CircuitBreaker:
+    # closed -> open nach N Fehlern in Folge, nach reset_timeout ein Testaufruf (half-open)
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._lock = Lock()
+        metrics.set(f"breaker.{name}", self.state)
+
+    def _set_state(self, state):
+        self.state = state
+        metrics.set(f"breaker.{self.name}", state)
+
+    def available(self):
+        with self._lock:
+            return self.state != "open" or time.monotonic() - self.opened_at >= self.reset_timeout
+
+    def allow(self):
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self._set_state("half-open")
+                self._trial_running = False
+            if self.state == "half-open":
+                if self._trial_running:
+                    return False
+                self._trial_running = True
+            return True
+
+    def release_trial(self):
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._trial_running = False
+            if self.state != "closed":
+                self._set_state("closed")
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == "half-open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    metrics.incr(f"breaker.{self.name}.trips")
+                self.opened_at = time.monotonic()
+                self._set_state("open")
+
+
+class CircuitBreakers:
+    def __init__(self):
+        self._lock = Lock()
+        self._breakers = {}
+
+    def get(self, service):
+        with self._lock:
+            breaker = self._breakers.get(service)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    service,
+                    failure_threshold=config.getint('resilience', 'failure_threshold', fallback=5),
+                    reset_timeout=config.getfloat('resilience', 'reset_timeout', fallback=30.0)
+                )
+                self._breakers[service] = breaker
+            return breaker
+
+    def reset(self, service):
+        # Neuer Schlüssel: alte Fehler zählen nicht mehr, der nächste get() baut einen frischen Breaker
+        with self._lock:
+            self._breakers.pop(service, None)
+
+
+circuit_breakers = CircuitBreakers()
+
+
+@contextmanager
+def file_lock(path):
+    # Exklusive Sperre über eine .lock-Datei daneben, das System gibt sie auch beim Absturz frei
+    with open(path + ".lock", "a+b") as handle:
+        if os.name == "nt":
+            import msvcrt
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+class UsageLedger:
+    """Requests, characters and tokens per service and day, plus what the caches saved.
+
+    Only the changes since the last flush are kept in memory and added to the file on every flush.
+    Load, add and replace run under a file lock, so the GUI and the engine process can count into
+    the same file without losing each other's increments. The file is never touched while
+    self._lock is held, so record() and usage() do not wait for the disk.
+    """
+    USAGE_FILE = os.path.join(os.path.expanduser("~"), ".td2_translator_usage.json")
+    FLUSH_INTERVAL = 10
+    FIELDS = ("requests", "characters", "tokens")
+    SAVED = "saved"
+
+    def __init__(self, path=USAGE_FILE):
+        self.path = path
+        self._lock = Lock()
+        self._flush_lock = Lock()
+        self._pending = {}
+        self._inflight = {}
+        self._totals = self._load()
+        self._generation = 0
+        self._flush_timer = None
+        self._refresh_thread = None
+
+    @staticmethod
+    def today():
+        return time.strftime("%Y-%m-%d")
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+                return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    def record(self, service, requests=0, characters=0, tokens=0):
+        with self._lock:
+            counters = self._pending.setdefault(self.today(), {}).setdefault(service, {})
+            for field, value in zip(self.FIELDS, (requests, characters, tokens)):
+                if value:
+                    counters[field] = counters.get(field, 0) + value
+            if self._flush_timer is None:
+                self._flush_timer = Timer(self.FLUSH_INTERVAL, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def record_saved(self, characters):
+        self.record(self.SAVED, requests=1, characters=characters)
+
+    def refresh(self):
+        # Was der andere Prozess inzwischen geschrieben hat
+        with self._lock:
+            generation = self._generation
+        totals = self._load()
+        with self._lock:
+            # Ein Flush dazwischen hat schon einen neueren Stand gesetzt
+            if generation == self._generation:
+                self._totals = totals
+
+    def refresh_async(self):
+        # Für den GUI-Thread: Datei im Hintergrund lesen, bis dahin gilt der letzte Stand
+        if self._refresh_thread is None or not self._refresh_thread.is_alive():
+            self._refresh_thread = Thread(target=self.refresh, name="UsageRefresh", daemon=True)
+            self._refresh_thread.start()
+
+    @staticmethod
+    def _add(target, counts):
+        for day, services in counts.items():
+            for service, counters in services.items():
+                stored = target.setdefault(day, {}).setdefault(service, {})
+                for field, value in counters.items():
+                    stored[field] = stored.get(field, 0) + value
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                self._flush_timer = None
+                if not self._pending:
+                    return
+                # Bis die Datei geschrieben ist, zählt usage() diese Werte über _inflight weiter mit
+                self._inflight, self._pending = self._pending, {}
+            try:
+                with file_lock(self.path):
+                    totals = self._load()
+                    self._add(totals, self._inflight)
+                    directory = os.path.dirname(self.path) or "."
+                    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory,
+                                                     prefix=".td2_usage_", suffix=".tmp", delete=False) as f:
+                        json.dump(totals, f, indent=1)
+                    os.replace(f.name, self.path)
+            except OSError:
+                # Zähler bleiben offen und werden beim nächsten Flush erneut geschrieben
+                metrics.incr("usage.errors")
+                with self._lock:
+                    self._add(self._pending, self._inflight)
+                    self._inflight = {}
+                return
+            with self._lock:
+                self._inflight = {}
+                self._totals = totals
+                self._generation += 1
+
+    def usage(self, service, field="characters", period="day"):
+        prefix = self.today() if period == "day" else self.today()[:7]
+        with self._lock:
+            return sum(counters.get(service, {}).get(field, 0)
+                       for data in (self._totals, self._inflight, self._pending)
+                       for day, counters in data.items() if day.startswith(prefix))
+
+    @staticmethod
+    def unit(service):
+        return "tokens" if service == "ChatGPT" else "characters"
+
+    def budget_state(self, service):
+        """None, "soft" or "hard", depending on the budgets in [budget.<service>]."""
+        section = f"budget.{service}"
+        state = None
+        for period in ("day", "month"):
+            used = None
+            for level in ("soft", "hard"):
+                limit = config.getint(section, f"{period}_{level}", fallback=0)
+                if not limit:
+                    continue
+                if used is None:
+                    used = self.usage(service, self.unit(service), period)
+                if used >= limit:
+                    state = level if state != "hard" else state
+        return state
+
+    def route(self, service, count=True):
+        """Service to use for the next request, None means cache only (hard budget reached, nothing cheaper left)."""
+        state = self.budget_state(service)
+        if state is None:
+            return service
+        chain = config.get('budget', 'downgrade', fallback=f'Google Translate, {LOCAL_SERVICE}')
+        for cheaper in [name.strip() for name in chain.split(',') if name.strip() and name.strip() != service]:
+            if self.budget_state(cheaper) is None:
+                if count:
+                    metrics.incr(f"budget.downgraded.{service}->{cheaper}")
+                return cheaper
+        return service if state == "soft" else None
+
+    def cost(self, service, period="day"):
+        price = config.getfloat(f"budget.{service}", "price_per_million", fallback=0.0)
+        return self.usage(service, self.unit(service), period) * price / 1_000_000
+
+
+usage = UsageLedger()
+
+
+def fallback_services(service):
+    configured = config.get('resilience', 'fallback', fallback='Google Translate')
+    return [name.strip() for name in configured.split(',') if name.strip() and name.strip() != service]
+
+
+class SingleFlight:
+    # Gleiche Anfragen, die gerade laufen, teilen sich ein Ergebnis statt erneut die API zu rufen
+    def __init__(self):
+        self._lock = Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+        if not leader:
+            metrics.incr("saved.single_flight")
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+class RequestBatcher:
+    # Gleichzeitige Anfragen für denselben Dienst und dieselbe Zielsprache gehen als ein API-Aufruf raus
+    def __init__(self, window=0.02, max_size=25, pending=None):
+        self.window = window
+        self.max_size = max_size
+        # Anzahl Übersetzungen, die noch dazukommen könnten; ohne Angabe wird immer gewartet
+        self.pending = pending
+        self._lock = Lock()
+        self._batches = {}
+
+    def submit(self, key, text, send):
+        future = Future()
+        with self._lock:
+            batch = self._batches.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._batches[key] = []
+            batch.append((text, future))
+            if len(batch) >= self.max_size:
+                self._batches.pop(key)
+        if not leader:
+            return future.result()
+
+        # Allein unterwegs: sofort senden statt das Fenster abzuwarten
+        if len(batch) > 1 or self.pending is None or self.pending() > 1:
+            time.sleep(self.window)
+        else:
+            metrics.incr("batching.no_wait")
+        with self._lock:
+            if self._batches.get(key) is batch:
+                self._batches.pop(key)
+        metrics.incr("batching.calls")
+        metrics.incr("batching.requests", len(batch))
+        try:
+            results = send([text for text, _ in batch])
+        except BaseException as e:
+            for _, waiting in batch:
+                waiting.set_exception(e)
+        else:
+            for (_, waiting), result in zip(batch, results):
+                waiting.set_result(result)
+        return future.result()
+
+
+class TranslationEngine:
+    # Gemeinsame Übersetzungsschicht für alle Tabs und den ManualTranslator
+    def __init__(self, glossary, scenery_names, templates=None):
+        self.glossary = glossary
+        self.templates = templates if templates is not None else TemplateEngine({}, glossary)
+        self.scenery_names = scenery_names
+        self.single_flight = SingleFlight()
+        self.batcher = RequestBatcher(
+            window=config.getfloat('batching', 'window_ms', fallback=20) / 1000,
+            max_size=config.getint('batching', 'max_size', fallback=25),
+            pending=translation_scheduler.pending
+        )
+        self._scenery_pattern = self._compile_scenery_pattern(scenery_names)
+        self._mask_cache = OrderedDict()
+        self._mask_lock = Lock()
+        self.hedge_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="Hedge")
+        self._hedge_lock = Lock()
+        self._hedge_requests = 0
+        self._hedges = 0
+        self.memory = TranslationMemory(
+            scenery_tokens=glossary.scenery_tokens,
+            max_entries=config.getint('translation_memory', 'max_entries', fallback=200000)
+        )
+
+    @staticmethod
+    def _compile_scenery_pattern(scenery_names):
+        # Alle Szenerienamen in einem Regex, längste zuerst; Masken werden für die Fan-out-Sprachen wiederverwendet
+        names = sorted(scenery_names, key=len, reverse=True)
+        return re.compile(r'\b(?:' + '|'.join(map(re.escape, names)) + r')\b') if names else None
+
+    def update_resources(self, glossary=None, scenery_names=None, templates=None):
+        # Neue Indizes sind schon fertig gebaut und werden nur noch zugewiesen;
+        # laufende Übersetzungen rechnen mit den Objekten zu Ende, die sie schon haben
+        if scenery_names is not None:
+            pattern = self._compile_scenery_pattern(scenery_names)
+            with self._mask_lock:
+                self.scenery_names = scenery_names
+                self._scenery_pattern = pattern
+                self._mask_cache = OrderedDict()
+        if glossary is not None:
+            self.glossary = glossary
+            self.memory.scenery_tokens = set(glossary.scenery_tokens)
+        if templates is not None:
+            self.templates = templates
+
+    def translate(self, text, target_language, translation_service):
+        return self.translate_with_source(text, target_language, translation_service)[0]
+
+    def translate_with_source(self, text, target_language, translation_service):
+        """Return (translation, source); source is "Template", "Glossary", "Skipped", "Memory" or the service that answered."""
+        rendered = self.templates.render(text, target_language)
+        if rendered is not None:
+            metrics.incr("saved.templates")
+            usage.record_saved(len(text))
+            return rendered, "Template"
+
+        local = self.glossary.translate(text, target_language)
+        if local is not None:
+            metrics.incr("saved.glossary")
+            usage.record_saved(len(text))
+            return local, "Glossary"
+
+        # Bereits in der Zielsprache? Dann ohne API-Aufruf durchreichen
+        if is_already_in_target_language(text, target_language):
+            usage.record_saved(len(text))
+            return text, "Skipped"
+
+        remembered = self.memory.lookup(text, target_language)
+        if remembered is not None:
+            usage.record_saved(len(text))
+            return remembered, "Memory"
+
+        key = (text, target_language, translation_service)
+        return self.single_flight.do(key, lambda: self._translate_and_remember(text, target_language, translation_service))
+
+    def _translate_and_remember(self, text, target_language, translation_service):
+        routed = usage.route(translation_service)
+        if routed is None:
+            # Hartes Budget erreicht und kein günstigerer Dienst frei: nur noch Cache, Glossar und Vorlagen
+            raise QuotaExceededError("budget used up", service=translation_service)
+        translated, service = self._translate_with_fallback(text, target_language, routed)
+        self.memory.store(text, target_language, translated)
+        return translated, service
+
+    def _translate_with_fallback(self, text, target_language, translation_service):
+        try:
+            return self._translate_hedged(text, target_language, translation_service)
+        except (CircuitOpenError, ConfigurationError) as e:
+            # Dienst ist aus (Breaker offen) oder nicht nutzbar: nächsten konfigurierten Dienst probieren
+            for fallback in fallback_services(translation_service):
+                if not circuit_breakers.get(fallback).available():
                     continue
-                if message in self.ignore_list:
+                metrics.incr(f"fallback.{translation_service}->{fallback}")
+                try:
+                    return self._translate_hedged(text, target_language, fallback)
+                except TranslationError:
                     continue
-                driver_name = None
-                dist = None
-
-                username_match = re.search(r'@([^\s:]+)', timestamp_user)
-                if username_match:
-                    driver_name = username_match.group(1)
-                    if not hasattr(self, "_driver_cache"):
-                        self._driver_cache = {}
-
-                    if driver_name not in self._driver_cache:
-                        self._driver_cache[driver_name] = self.get_driver_distance(driver_name)
-
-                    dist = self._driver_cache.get(driver_name)
-
-                # --- NEU: Warnlogik nur mit Fahrername ---
-                if driver_name and self.enable_driver_warning():
-                    # Warnen bei unbekannter Distanz (None) ODER < 100, nur einmal pro Fahrer
-                    if (dist is None or (isinstance(dist, (int, float)) and dist < 100)) and driver_name not in self.warned_drivers:
-                        warning = f"ATTENTION: DRIVER {driver_name} drove less than 100 KM, be careful!"
-                        translated_lines.append((warning, "warning"))
-                        self.play_warning_sound.emit()
-                        self.warned_drivers.add(driver_name)
-
-
-                current_target_language = self.language_var() if callable(self.language_var) else self.language_var
-                translation_service = self.service_var() if callable(self.service_var) else self.service_var
-                self.target_language = current_target_language
-
-                future = executor.submit(self.translate_message, message, translation_service)
-                future_to_line[future] = (timestamp_user, tag)
-            for future in future_to_line:
-                timestamp_user, tag = future_to_line[future]
-                translation = future.result()
-                translation = re.sub(r'【[^】]*】', '', translation).strip()
-                translated_lines.append((f"{timestamp_user}: {translation}", tag))
-        return translated_lines
-
-    def translate_message(self, text, translation_service):
-        current_target_language = self.target_language
-        text_lower = text.lower()
-
-        if (
-            text_lower in self.fixed_translations  
-            and current_target_language in self.fixed_translations[text_lower]
-        ):
-            return self.fixed_translations[text_lower][current_target_language]
-
-    
+            raise e
+
+    def _translate_with_retries(self, text, target_language, translation_service, cancelled=None):
         masked_text, mask_map = self._mask_scenery_names(text)
 
-        if translation_service == "ChatGPT":
-            translated = self.translate_with_chatgpt(masked_text)
-        elif translation_service == "Google Translate":
-            translated = self.translate_with_google(masked_text)
-        elif translation_service == "Deepl":
-            translated = self.translate_with_deepl(masked_text)
-        else:  
-            translated = masked_text
+        if translation_service in self.BATCHED_SERVICES and config.getboolean('batching', 'enabled', fallback=True):
+            # Breaker und Wiederholungen einmal pro Sammelaufruf, die Wartenden übernehmen dessen Ergebnis
+            translated = self.batcher.submit(
+                (translation_service, target_language), masked_text,
+                lambda texts: self._call_with_retries(texts, target_language, translation_service)
+            )
+        else:
+            translated = self._call_with_retries([masked_text], target_language, translation_service, cancelled)
+            if translated is None:
+                return None
+            translated = translated[0]
+        return self._unmask_scenery_names(translated, mask_map)
 
+    def _call_with_retries(self, texts, target_language, translation_service, cancelled=None):
+        breaker = circuit_breakers.get(translation_service)
+        max_retries = config.getint('resilience', 'max_retries', fallback=2)
+        base_delay = config.getfloat('resilience', 'backoff_base', fallback=0.5)
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise CircuitOpenError(service=translation_service)
+            try:
+                result = self._call_service(texts, target_language, translation_service, cancelled)
+            except TranslationError as e:
+                metrics.incr(f"errors.{translation_service}.{e.reason}")
+                if isinstance(e, ConfigurationError):
+                    breaker.release_trial()
+                    raise
+                breaker.record_failure()
+                if not breaker.available():
+                    raise CircuitOpenError(str(e), service=translation_service, status=e.status) from e
+                if not e.retryable or attempt >= max_retries:
+                    raise
+                attempt += 1
+                metrics.incr(f"retries.{translation_service}")
+                # Exponentielles Backoff mit vollem Jitter
+                time.sleep(random.uniform(0, base_delay * (2 ** attempt)))
+                continue
+            breaker.record_success()
+            return result
+
+    def _hedge_delay(self, translation_service):
+        delay_ms = config.getfloat('hedging', 'delay_ms', fallback=0)
+        if delay_ms > 0:
+            return delay_ms / 1000
+        p90 = service_limits.get(translation_service).percentile(0.9)
+        return p90 if p90 is not None else 2.5
+
+    def _translate_hedged(self, text, target_language, translation_service):
+        secondary = config.get('hedging', 'secondary', fallback='').strip()
+        if (not config.getboolean('hedging', 'enabled', fallback=False)
+                or not secondary or secondary == translation_service):
+            return self._translate_with_retries(text, target_language, translation_service), translation_service
+
+        with self._hedge_lock:
+            self._hedge_requests += 1
+        cancel_primary, cancel_secondary = Event(), Event()
+        priority = current_priority()
+        primary = self.hedge_pool.submit(run_with_priority, priority, self._translate_with_retries,
+                                         text, target_language, translation_service, cancel_primary)
+        try:
+            return primary.result(timeout=self._hedge_delay(translation_service)), translation_service
+        except FutureTimeout:
+            pass
 
-        return self._unmask_scenery_names(translated, mask_map)
+        # Hedges auf einen Anteil des Traffics begrenzen, damit die Kosten überschaubar bleiben
+        max_ratio = config.getfloat('hedging', 'max_ratio', fallback=0.1)
+        with self._hedge_lock:
+            allowed = self._hedges < max_ratio * self._hedge_requests
+            if allowed:
+                self._hedges += 1
+        if not allowed:
+            metrics.incr("hedging.skipped_budget")
+            return primary.result(), translation_service
+
+        metrics.incr("hedging.fired")
+        backup = self.hedge_pool.submit(run_with_priority, priority, self._translate_with_retries,
+                                        text, target_language, secondary, cancel_secondary)
+        pending = {primary, backup}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None or not pending:
+                    # Verlierer abbrechen; läuft er schon, wird sein Ergebnis verworfen
+                    (cancel_secondary if future is primary else cancel_primary).set()
+                    for loser in pending:
+                        loser.cancel()
+                    if future is backup:
+                        metrics.incr("hedging.secondary_won")
+                    return future.result(), secondary if future is backup else translation_service
+
+    BATCHED_SERVICES = {"Deepl", "Google Translate", LOCAL_SERVICE}
+
+    def _call_service(self, texts, target_language, translation_service, cancelled=None):
+        limiter = service_limits.get(translation_service)
+        started = limiter.acquire()
+        if cancelled is not None and cancelled.is_set():
+            limiter.release(started, failed=True)
+            return None
+        metrics.incr("api_calls." + translation_service)
+        failed, status = False, None
+        try:
+            if translation_service == "ChatGPT":
+                result = [self.translate_with_chatgpt(text, target_language) for text in texts]
+            elif translation_service == "Google Translate":
+                result = self.translate_with_google(texts, target_language)
+            elif translation_service == "Deepl":
+                result = self.translate_with_deepl(texts, target_language)
+            elif translation_service == LOCAL_SERVICE:
+                result = backends.local_translator().translate(texts, target_language)
+            else:
+                return texts
+            usage.record(translation_service, requests=1, characters=sum(len(text) for text in texts))
+            return result
+        except TranslationError as e:
+            failed, status = True, e.status
+            raise
+        except Exception as e:
+            failed, status = True, error_status(e)
+            raise classify_error(e, translation_service, status) from e
+        finally:
+            limiter.release(started, failed, status)
 
     def _mask_scenery_names(self, text):
+        with self._mask_lock:
+            cached = self._mask_cache.get(text)
+            if cached is not None:
+                self._mask_cache.move_to_end(text)
+                return cached
         mask_map = {}
-        masked_text = text
-        for name in sorted(self.scenery_names, key=len, reverse=True):
-            pattern = r'\b' + re.escape(name) + r'\b'
-            mask = f"__SCENERY_{hash(name)}__"
-            if re.search(pattern, masked_text):
-                masked_text = re.sub(pattern, mask, masked_text)
-                mask_map[mask] = name
+
+        def mask(match):
+            name = match.group(0)
+            key = f"__SCENERY_{hash(name)}__"
+            mask_map[key] = name
+            return key
+
+        masked_text = self._scenery_pattern.sub(mask, text) if self._scenery_pattern else text
+        with self._mask_lock:
+            self._mask_cache[text] = (masked_text, mask_map)
+            if len(self._mask_cache) > 256:
+                self._mask_cache.popitem(last=False)
         return masked_text, mask_map
 
     def _unmask_scenery_names(self, text, mask_map):
@@ -256,68 +2506,66 @@ class LogHandler(QtCore.QObject):
             text = text.replace(mask, name)
         return text
 
-    def translate_with_chatgpt(self, text):
-        try:
-            thread = self.openai_client.beta.threads.create()
-            self.openai_client.beta.threads.messages.create(
-                thread_id=thread.id,
-                role="user",
-                content=(
-                    f"Translate the following Sentence to {self.target_language}. "
-                    f"Only provide the translation without any explanations or additional text. "
-                    f"If there are parts that cannot be translated (e.g., names, emojis), leave those unchanged: {text}"
-                )
+    def translate_with_chatgpt(self, text, target_language):
+        client = backends.openai_client()
+        thread = client.beta.threads.create()
+        client.beta.threads.messages.create(
+            thread_id=thread.id,
+            role="user",
+            content=(
+                f"Translate the following Sentence to {target_language}. "
+                f"Only provide the translation without any explanations or additional text. "
+                f"If there are parts that cannot be translated (e.g., names, emojis), leave those unchanged: {text}"
             )
+        )
 
-            run = self.openai_client.beta.threads.runs.create_and_poll(
-                thread_id=thread.id,
-                assistant_id="asst_dxWUY2bN5TSwZXi09Q7HKITj",
-                instructions=(
-                    "You are a translator. Translate the text to the requested language only. "
-                    "Do not explain anything. Keep names and symbols unchanged."
-                )
+        run = client.beta.threads.runs.create_and_poll(
+            thread_id=thread.id,
+            assistant_id="asst_dxWUY2bN5TSwZXi09Q7HKITj",
+            instructions=(
+                "You are a translator. Translate the text to the requested language only. "
+                "Do not explain anything. Keep names and symbols unchanged."
             )
+        )
 
-            if run.status == 'completed':
-                messages = self.openai_client.beta.threads.messages.list(thread_id=thread.id)
-                message_data = messages.data
-                if message_data:
-                    for message in reversed(message_data):
-                        if message.role == "assistant" and message.content:
-                            return message.content[0].text.value.strip()
-                    return "No assistant message found"
-                return "No messages found"
-            else:
-                return f"Run not completed. Status: {run.status}"
-
-        except Exception as e:
-            return f"[ChatGPT Error] {str(e)}"
-
-
-    def translate_with_google(self, text):
-        try:
-            result = self.translator.translate(text, dest=self.target_language)
-            if hasattr(result, "__await__"):
-                import asyncio
-                try:
-                    loop = asyncio.get_event_loop()
-                except RuntimeError:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                result = loop.run_until_complete(result)
-            return result.text
-        except Exception as e:
-            return str(e)
-
-    def translate_with_deepl(self, text):
-        target_lang_code = self.get_deepl_language_code(self.target_language)
+        if run.status == 'completed':
+            run_usage = getattr(run, "usage", None)
+            if run_usage is not None:
+                usage.record("ChatGPT", tokens=getattr(run_usage, "total_tokens", 0) or 0)
+            messages = client.beta.threads.messages.list(thread_id=thread.id)
+            message_data = messages.data
+            if message_data:
+                for message in reversed(message_data):
+                    if message.role == "assistant" and message.content:
+                        return message.content[0].text.value.strip()
+                raise TranslationError("No assistant message found", service="ChatGPT")
+            raise TranslationError("No messages found", service="ChatGPT")
+        else:
+            raise ServiceUnavailableError(f"Run not completed. Status: {run.status}", service="ChatGPT")
+
+    def translate_with_google(self, text, target_language):
+        # text darf auch eine Liste sein, dann kommt eine Liste zurück
+        result = backends.google_translator().translate(text, dest=target_language)
+        if hasattr(result, "__await__"):
+            import asyncio
+            try:
+                loop = asyncio.get_event_loop()
+            except RuntimeError:
+                loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(loop)
+            result = loop.run_until_complete(result)
+        if isinstance(result, list):
+            return [item.text for item in result]
+        return result.text
+
+    def translate_with_deepl(self, text, target_language):
+        target_lang_code = self.get_deepl_language_code(target_language)
         if not target_lang_code:
-            return f"Target language '{self.target_language}' not supported by Deepl"
-        try:
-            result = self.deepl_translator.translate_text(text, target_lang=target_lang_code)
-            return result.text
-        except Exception as e:
-            return str(e)
+            raise ConfigurationError(f"Target language '{target_language}' not supported by Deepl", service="Deepl")
+        result = backends.deepl_translator().translate_text(text, target_lang=target_lang_code)
+        if isinstance(result, list):
+            return [item.text for item in result]
+        return result.text
 
     @staticmethod
     def get_deepl_language_code(language):
@@ -352,123 +2600,481 @@ class LogHandler(QtCore.QObject):
         return language_codes.get(language, None)
 
 
+class ResourceWatcher:
+    # Merkt Änderungen an config.cfg und den CSV-Dateien über Änderungszeit und Größe
+    FILES = {
+        "config": "config.cfg",
+        "ignore_list": os.path.join("res", "ignore_list.csv"),
+        "fixed_translations": os.path.join("res", "fixed_translations.csv"),
+        "scenery_names": os.path.join("res", "Scenery_Names.csv"),
+        "system_templates": os.path.join("res", "system_templates.csv"),
+    }
+
+    def __init__(self):
+        self._stamps = {name: self._stamp(name) for name in self.FILES}
+
+    def _stamp(self, name):
+        try:
+            stat = os.stat(resource_path(self.FILES[name]))
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def changed(self):
+        changed = set()
+        for name in self.FILES:
+            stamp = self._stamp(name)
+            if stamp != self._stamps[name]:
+                self._stamps[name] = stamp
+                changed.add(name)
+        return changed
+
+
+def reload_config():
+    global config
+    new_config = configparser.ConfigParser()
+    new_config.read(resource_path('config.cfg'))
+    old_config = config
+    old_local = dict(old_config['local']) if old_config.has_section('local') else {}
+    # Eine einzige Zuweisung: jeder Aufruf sieht entweder die alte oder die neue Konfiguration
+    config = new_config
+    for service, key_name in ServiceLimits.KEY_NAMES.items():
+        if old_config['DEFAULT'].get(key_name, '').strip() != api_key(key_name):
+            backends.reset(service)
+            circuit_breakers.reset(service)
+            metrics.incr(f"reload.key.{service}")
+    if (dict(config['local']) if config.has_section('local') else {}) != old_local:
+        backends.reset(LOCAL_SERVICE)
+
+
+def reload_resources(changed, engine):
+    """Rebuild only what depends on the changed files; returns a new FilterEngine if ignore_list.csv changed."""
+    filter_engine = None
+    try:
+        if "config" in changed:
+            reload_config()
+        if "fixed_translations" in changed or "scenery_names" in changed:
+            scenery_names = None
+            if "scenery_names" in changed:
+                scenery_names = load_scenery_names(resource_path(os.path.join('res', 'Scenery_Names.csv')))
+            glossary = GlossaryIndex(load_fixed_translations(resource_path(os.path.join('res', 'fixed_translations.csv'))),
+                                     scenery_names if scenery_names is not None else engine.scenery_names)
+            templates = TemplateEngine(load_system_templates(resource_path(os.path.join('res', 'system_templates.csv'))), glossary)
+            engine.update_resources(glossary, scenery_names, templates)
+        elif "system_templates" in changed:
+            templates = TemplateEngine(load_system_templates(resource_path(os.path.join('res', 'system_templates.csv'))), engine.glossary)
+            engine.update_resources(templates=templates)
+        if "ignore_list" in changed:
+            filter_engine = load_ignore_list(resource_path(os.path.join('res', 'ignore_list.csv')))
+    except Exception:
+        # Halb gespeicherte oder kaputte Datei: alte Indizes behalten, beim nächsten Speichern erneut versuchen
+        metrics.incr("reload.errors")
+        return None
+    for name in changed:
+        metrics.incr(f"reload.{name}")
+    return filter_engine
+
+
+def build_translation_engine():
+    fixed_translations = load_fixed_translations(resource_path(os.path.join('res', 'fixed_translations.csv')))
+    scenery_names = load_scenery_names(resource_path(os.path.join('res', 'Scenery_Names.csv')))
+    glossary = GlossaryIndex(fixed_translations, scenery_names)
+    templates = TemplateEngine(load_system_templates(resource_path(os.path.join('res', 'system_templates.csv'))), glossary)
+    return TranslationEngine(glossary, scenery_names, templates)
+
+
 class ManualTranslator:
-    def __init__(self, language_var, service_var, fixed_translations, scenery_names):
+    def __init__(self, language_var, service_var, engine):
         self.language_var = language_var
         self.service_var = service_var
-        self.fixed_translations = fixed_translations
-        self.scenery_names = scenery_names
-        self.translator = Translator()
-        self.deepl_translator = deepl.Translator(deepl_api_key)
-        self.openai_client = OpenAI(api_key=config['DEFAULT']['OPENAI_API_KEY'])
-        self.target_language = "English"
+        self.engine = engine
 
     def translate(self, text):
-        self.target_language = self.language_var() if callable(self.language_var) else self.language_var
+        target_language = self.language_var() if callable(self.language_var) else self.language_var
         translation_service = self.service_var() if callable(self.service_var) else self.service_var
-        text_lower = text.lower()
+        return self.engine.translate(text, target_language, translation_service)
 
-        if (
-            text_lower in self.fixed_translations
-            and self.target_language in self.fixed_translations[text_lower]
-        ):
-            return self.fixed_translations[text_lower][self.target_language]
+    def submit(self, text):
+        # Priorität -1 = interaktiv, läuft vor allen Chatnachrichten; gleicher Cache wie die Logs
+        target_language = self.language_var() if callable(self.language_var) else self.language_var
+        translation_service = self.service_var() if callable(self.service_var) else self.service_var
+        return translation_scheduler.submit(-1, self.engine.translate, text, target_language, translation_service)
+
+def run_engine_process(conn, options):
+    # Läuft im Kindprozess: Log-Tailing und Übersetzung, Ergebnisse gehen gebündelt über die Pipe zurück
+    filter_engine = load_ignore_list(resource_path(os.path.join('res', 'ignore_list.csv')))
+    engine = build_translation_engine()
+    poll_interval = config.getint('engine', 'poll_ms', fallback=5000) / 1000
+    if options["service"] == LOCAL_SERVICE:
+        warm_up_local(options["languages"])
+    handlers = {}
+    pending = []
+    watcher = ResourceWatcher()
+
+    def open_log(log_file_path, position):
+        handler = LogHandler(
+            log_file_path=log_file_path,
+            language_var=lambda: options["languages"],
+            service_var=lambda: options["service"],
+            filter_engine=filter_engine,
+            engine=engine,
+            enable_driver_warning=lambda: options["driver_warnings"],
+            my_names=lambda: options["my_names"]
+        )
+        # Den Warnton spielt die GUI, sobald ein Warn-Event ankommt
+        handler.play_warning_sound.disconnect()
+        handler.lines_translated.connect(lambda lines: pending.append((handler, lines)))
+        if position is None:
+            handler.file.seek(0, os.SEEK_END)
+        else:
+            handler.file.seek(position)
+        handler.last_position = handler.file.tell()
+        handlers[log_file_path] = handler
 
-        masked_text, mask_map = self._mask_scenery_names(text)
+    next_check = time.monotonic()
+    next_metrics = time.monotonic()
+    while True:
+        try:
+            if conn.poll(max(0.0, next_check - time.monotonic())):
+                command, *args = conn.recv()
+                if command == "stop":
+                    break
+                elif command == "open" and args[0] not in handlers:
+                    open_log(*args)
+                elif command == "close" and args[0] in handlers:
+                    handlers.pop(args[0]).close()
+                elif command == "options":
+                    if args[0].get("service") == LOCAL_SERVICE:
+                        warm_up_local(args[0].get("languages", options["languages"]))
+                    options.update(args[0])
+                continue
+            next_check = time.monotonic() + poll_interval
+            changed = watcher.changed()
+            if changed:
+                new_filter_engine = reload_resources(changed, engine)
+                if new_filter_engine is not None:
+                    filter_engine = new_filter_engine
+                    for handler in handlers.values():
+                        handler.filter_engine = filter_engine
+            for handler in handlers.values():
+                handler.check_new_lines()
+            while pending:
+                handler, lines = pending.pop(0)
+                # Als Tupel, damit die GUI die Events unabhängig vom Modulnamen des Kindprozesses entpickeln kann
+                events = [event.fields() for event in handler.translate_events(lines)]
+                conn.send(("events", handler.log_file_path, events, handler.last_position))
+            if time.monotonic() >= next_metrics:
+                next_metrics = time.monotonic() + 2
+                conn.send(("metrics", metrics.snapshot()))
+        except (EOFError, OSError):
+            # GUI ist weg
+            break
+    for handler in handlers.values():
+        handler.close()
+    usage.flush()
+
+
+class RemoteLogHandler:
+    # Stellvertreter im GUI-Prozess, das eigentliche Log verfolgt der Engine-Prozess
+    def __init__(self, log_file_path, engine_process):
+        self.log_file_path = log_file_path
+        self.engine_process = engine_process
+        engine_process.open_log(log_file_path)
 
-        if translation_service == "ChatGPT":
-            translated = self.translate_with_chatgpt(masked_text)
-        elif translation_service == "Google Translate":
-            translated = self.translate_with_google(masked_text)
-        elif translation_service == "Deepl":
-            translated = self.translate_with_deepl(masked_text)
-        else:
-            translated = masked_text
+    def close(self):
+        self.engine_process.close_log(self.log_file_path)
 
-        return self._unmask_scenery_names(translated, mask_map)
 
-    def _mask_scenery_names(self, text):
-        mask_map = {}
-        masked_text = text
-        for name in sorted(self.scenery_names, key=len, reverse=True):
-            pattern = r'\\b' + re.escape(name) + r'\\b'
-            mask = f"__SCENERY_{hash(name)}__"
-            if re.search(pattern, masked_text):
-                masked_text = re.sub(pattern, mask, masked_text)
-                mask_map[mask] = name
-        return masked_text, mask_map
+class EngineProcess(QtCore.QObject):
+    """Runs log tailing and translation in a child process and restarts it if it dies."""
+    events_ready = QtCore.pyqtSignal(str, list)
 
-    def _unmask_scenery_names(self, text, mask_map):
-        for mask, name in mask_map.items():
-            text = text.replace(mask, name)
-        return text
+    def __init__(self, options, parent=None):
+        super().__init__(parent)
+        self.options = dict(options)
+        # Log -> letzte gelesene Position, damit ein neu gestarteter Prozess dort weiterliest
+        self.logs = {}
+        self._lock = RLock()
+        self._stopping = False
+        self._restart_delay = 1.0
+        self._start()
+
+    def _start(self):
+        # spawn statt fork: die Threads des Elternprozesses (Scheduler, Writer) dürfen nicht mitkopiert werden
+        import multiprocessing
+        context = multiprocessing.get_context("spawn")
+        with self._lock:
+            conn, child_conn = context.Pipe()
+            self._process = context.Process(target=run_engine_process, args=(child_conn, self.options),
+                                            name="TD2Engine", daemon=True)
+            self._process.start()
+            child_conn.close()
+            self._conn = conn
+            self._started_at = time.monotonic()
+            for log_file_path, position in self.logs.items():
+                self._send(("open", log_file_path, position))
+        Thread(target=self._read_loop, args=(conn, self._process), name="EngineReader", daemon=True).start()
+
+    def _send(self, message):
+        with self._lock:
+            try:
+                self._conn.send(message)
+            except (OSError, ValueError):
+                # Prozess ist weg, der Reader startet ihn neu und schickt den Zustand erneut
+                pass
+
+    def open_log(self, log_file_path):
+        with self._lock:
+            self.logs[log_file_path] = None
+            self._send(("open", log_file_path, None))
+
+    def close_log(self, log_file_path):
+        with self._lock:
+            self.logs.pop(log_file_path, None)
+            self._send(("close", log_file_path))
+
+    def update(self, **options):
+        with self._lock:
+            self.options.update(options)
+            self._send(("options", options))
+
+    def _read_loop(self, conn, process):
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            if message[0] == "events":
+                _, log_file_path, events, position = message
+                with self._lock:
+                    if log_file_path in self.logs:
+                        self.logs[log_file_path] = position
+                self.events_ready.emit(log_file_path, [ChatEvent(*fields) for fields in events])
+            elif message[0] == "metrics":
+                for name, value in message[1].items():
+                    metrics.set("engine_process." + name, value)
+        process.join(timeout=1)
+        conn.close()
+        if self._stopping:
+            return
+        metrics.incr("engine_process.restarts")
+        # Backoff, falls der Prozess direkt nach dem Start wieder abstürzt
+        if time.monotonic() - self._started_at > 60:
+            self._restart_delay = 1.0
+        time.sleep(self._restart_delay)
+        self._restart_delay = min(self._restart_delay * 2, 30.0)
+        if not self._stopping:
+            self._start()
+
+    def stop(self):
+        self._stopping = True
+        self._send(("stop",))
+        self._process.join(timeout=3)
+        if self._process.is_alive():
+            self._process.terminate()
+
+
+class MetricsDialog(QtWidgets.QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Metrics")
+        self.resize(360, 300)
+        layout = QtWidgets.QVBoxLayout(self)
+        self.view = QtWidgets.QPlainTextEdit()
+        self.view.setReadOnly(True)
+        self.view.setFont(QtGui.QFont("Consolas", 9))
+        layout.addWidget(self.view)
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+        self.refresh()
+
+    def refresh(self):
+        data = metrics.snapshot()
+        lines = []
+        for name in sorted(data):
+            value = data[name]
+            if isinstance(value, float):
+                value = f"{value:.2f}"
+            lines.append(f"{name:<40} {value}")
+        self.view.setPlainText("\n".join(lines) or "No data yet")
+
+
+class SearchDialog(QtWidgets.QDialog):
+    KIND_LABELS = {"fahrdienstleiter": "Dispatcher", "swdr": "SWDR", "translated": "Player", "system": "System", "warning": "Warning"}
+    RANGES = (("Any time", None), ("Last hour", 3600), ("Last 24 hours", 86400), ("Last 7 days", 7 * 86400), ("Last 30 days", 30 * 86400))
 
-    def translate_with_chatgpt(self, text):
+    def __init__(self, search_index, language, parent=None):
+        super().__init__(parent)
+        self.search_index = search_index
+        self.language = language
+        self.setWindowTitle("Search Chat History")
+        self.resize(900, 500)
+        layout = QtWidgets.QVBoxLayout(self)
+        filters = QtWidgets.QHBoxLayout()
+        self.text_input = QtWidgets.QLineEdit()
+        self.text_input.setPlaceholderText("Words in original or translation...")
+        filters.addWidget(self.text_input, 3)
+        self.sender_input = QtWidgets.QLineEdit()
+        self.sender_input.setPlaceholderText("Sender")
+        filters.addWidget(self.sender_input, 1)
+        self.scenery_input = QtWidgets.QLineEdit()
+        self.scenery_input.setPlaceholderText("Scenery")
+        filters.addWidget(self.scenery_input, 1)
+        self.kind_combo = QtWidgets.QComboBox()
+        self.kind_combo.addItem("All kinds", None)
+        for kind in SearchIndex.KINDS:
+            self.kind_combo.addItem(self.KIND_LABELS[kind], kind)
+        filters.addWidget(self.kind_combo)
+        self.range_combo = QtWidgets.QComboBox()
+        for label, seconds in self.RANGES:
+            self.range_combo.addItem(label, seconds)
+        filters.addWidget(self.range_combo)
+        layout.addLayout(filters)
+
+        self.results = QtWidgets.QTableWidget(0, 4)
+        self.results.setHorizontalHeaderLabels(["Time", "Sender", "Original", "Translation"])
+        self.results.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.results.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
+        self.results.verticalHeader().setVisible(False)
+        self.results.horizontalHeader().setStretchLastSection(True)
+        self.results.setWordWrap(True)
+        layout.addWidget(self.results)
+        self.status = QtWidgets.QLabel()
+        layout.addWidget(self.status)
+
+        # Suche erst nach kurzer Tipp-Pause
+        self.search_timer = QtCore.QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(200)
+        self.search_timer.timeout.connect(self.run_search)
+        for line_edit in (self.text_input, self.sender_input, self.scenery_input):
+            line_edit.textChanged.connect(self.search_timer.start)
+        self.kind_combo.currentIndexChanged.connect(self.run_search)
+        self.range_combo.currentIndexChanged.connect(self.run_search)
+        self.run_search()
+
+    def run_search(self):
+        seconds = self.range_combo.currentData()
+        start = time.perf_counter()
+        results = self.search_index.search(
+            self.text_input.text(), self.sender_input.text(), self.scenery_input.text(),
+            kind=self.kind_combo.currentData(), since=time.time() - seconds if seconds else None
+        )
+        elapsed = (time.perf_counter() - start) * 1000
+        language = self.language() if callable(self.language) else self.language
+        self.results.setRowCount(len(results))
+        for row, (session, event) in enumerate(results):
+            data = event.to_dict()
+            stamp = time.strftime("%Y-%m-%d ", time.localtime(event.received)) + (data["time"] or time.strftime("%H:%M:%S", time.localtime(event.received)))
+            translation = event.translations.get(language) or next(iter(event.translations.values()), "")
+            for column, value in enumerate((stamp, data["sender"] or "", event.message, translation)):
+                item = QtWidgets.QTableWidgetItem(value)
+                item.setToolTip(f"{session} / {event.log}" if column == 0 else value)
+                self.results.setItem(row, column, item)
+        self.results.resizeColumnToContents(0)
+        self.results.resizeColumnToContents(1)
+        self.status.setText(f"{len(results)} results in {elapsed:.1f} ms")
+
+
+class SettingsStore(QtCore.QObject):
+    SETTINGS_FILE = os.path.join(os.path.expanduser("~"), ".td2_translator_settings.json")
+    LEGACY_OVERLAY_FILE = os.path.join(os.path.expanduser("~"), ".td2_overlay_settings.json")
+    SAVE_DELAY_MS = 1000
+
+    def __init__(self, path=SETTINGS_FILE, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self._data = self._load()
+        # Änderungen sammeln und erst nach einer Ruhepause schreiben
+        self._save_timer = QtCore.QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.timeout.connect(self.flush)
+        self._write_queue = Queue()
+        self._writer = Thread(target=self._write_loop, name="SettingsWriter", daemon=True)
+        self._writer.start()
+
+    def _load(self):
         try:
-            thread = self.openai_client.beta.threads.create()
-            self.openai_client.beta.threads.messages.create(
-                thread_id=thread.id,
-                role="user",
-                content=(
-                    f"Translate the following Sentence to {self.target_language}. "
-                    f"Only provide the translation without any explanations or additional text. "
-                    f"If there are parts that cannot be translated (e.g., names, emojis), leave those unchanged: {text}"
-                )
-            )
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+                if isinstance(data, dict):
+                    return data
+        except Exception:
+            pass
+        # Alte Overlay-Einstellungen einmalig übernehmen
+        data = {}
+        try:
+            with open(self.LEGACY_OVERLAY_FILE, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+                if legacy.get("pos"):
+                    data["overlay_pos"] = legacy["pos"]
+                if legacy.get("size"):
+                    data["overlay_size"] = legacy["size"]
+        except Exception:
+            pass
+        return data
 
-            run = self.openai_client.beta.threads.runs.create_and_poll(
-                thread_id=thread.id,
-                assistant_id="asst_dxWUY2bN5TSwZXi09Q7HKITj",
-                instructions=(
-                    "You are a translator. Translate the text to the requested language only. "
-                    "Do not explain anything. Keep names and symbols unchanged."
-                )
-            )
+    def get(self, key, default=None):
+        return self._data.get(key, default)
 
-            if run.status == 'completed':
-                messages = self.openai_client.beta.threads.messages.list(thread_id=thread.id)
-                message_data = messages.data
-                if message_data:
-                    for message in reversed(message_data):
-                        if message.role == "assistant" and message.content:
-                            return message.content[0].text.value.strip()
-                    return "No assistant message found"
-                return "No messages found"
-            else:
-                return f"Run not completed. Status: {run.status}"
+    def set(self, key, value):
+        if self._data.get(key) == value:
+            return
+        # Kopie speichern, sonst ist eine später in-place geänderte Liste schon "gleich" und wird nie gesichert
+        self._data[key] = value.copy() if isinstance(value, (list, dict)) else value
+        self._save_timer.start(self.SAVE_DELAY_MS)
 
-        except Exception as e:
-            return f"[ChatGPT Error] {str(e)}"
+    def update(self, **values):
+        for key, value in values.items():
+            self.set(key, value)
 
-    def translate_with_google(self, text):
-        try:
-            result = self.translator.translate(text, dest=self.target_language)
-            if hasattr(result, "__await__"):
-                import asyncio
-                try:
-                    loop = asyncio.get_event_loop()
-                except RuntimeError:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                result = loop.run_until_complete(result)
-            return result.text
-        except Exception as e:
-            return str(e)
+    def flush(self):
+        self._save_timer.stop()
+        self._write_queue.put(json.dumps(self._data, indent=2))
 
-    def translate_with_deepl(self, text):
-        target_lang_code = LogHandler.get_deepl_language_code(self.target_language)
-        if not target_lang_code:
-            return f"Target language '{self.target_language}' not supported by Deepl"
+    def close(self):
+        if self._save_timer.isActive():
+            self.flush()
+        self._write_queue.put(None)
+        self._writer.join(timeout=2)
+
+    def _write_loop(self):
+        while True:
+            payload = self._write_queue.get()
+            if payload is None:
+                return
+            # Nur den neuesten Stand schreiben, ältere Snapshots verwerfen
+            while not self._write_queue.empty():
+                newer = self._write_queue.get()
+                if newer is None:
+                    self._write_atomic(payload)
+                    return
+                payload = newer
+            self._write_atomic(payload)
+
+    def _write_atomic(self, payload):
+        directory = os.path.dirname(self.path) or "."
+        tmp_path = None
         try:
-            result = self.deepl_translator.translate_text(text, target_lang=target_lang_code)
-            return result.text
-        except Exception as e:
-            return str(e)
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory,
+                                             prefix=".td2_settings_", suffix=".tmp", delete=False) as f:
+                tmp_path = f.name
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if tmp_path and os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
 
 class OverlayWindow(QtWidgets.QWidget):
-    SETTINGS_FILE = os.path.join(os.path.expanduser("~"), ".td2_overlay_settings.json")
+    MAX_LINES = 30
 
-    def __init__(self, parent=None, dark_mode=True, font_size=10):
+    def __init__(self, parent=None, dark_mode=True, font_size=10, max_lines=MAX_LINES, settings=None, languages=("English",)):
         super().__init__(parent)
         self.setWindowFlags(
             QtCore.Qt.WindowType.FramelessWindowHint |
@@ -478,18 +3084,15 @@ class OverlayWindow(QtWidgets.QWidget):
         self.setWindowOpacity(0.95)
         self.resize(400, 200)
         self.setMinimumSize(200, 100)
+        self.settings = settings
         self.font_size = font_size
-        self.text_edit = QtWidgets.QTextEdit(self)
-        self.text_edit.setReadOnly(True)
-        self.text_edit.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        self.text_edit.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        self.text_edit.setFont(QtGui.QFont("Helvetica", self.font_size, QtGui.QFont.Weight.Bold))
-        self.text_edit.setStyleSheet(
-            f"background-color: {'#3E3E3E' if dark_mode else '#FFFFFF'};"  # keine 'color:' hier
-        )
+        self.dark_mode = dark_mode
+        self.max_lines = max_lines
+        # Eine Spalte je Zielsprache
+        self.columns = LanguageColumns(self._make_text_edit, languages, self)
         layout = QtWidgets.QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
-        layout.addWidget(self.text_edit)
+        layout.addWidget(self.columns)
         self.setLayout(layout)
         self._drag_pos = None
 
@@ -498,30 +3101,37 @@ class OverlayWindow(QtWidgets.QWidget):
 
         self.load_overlay_settings()
 
+    def _make_text_edit(self):
+        text_edit = QtWidgets.QTextEdit()
+        text_edit.setReadOnly(True)
+        text_edit.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        text_edit.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        text_edit.setFont(QtGui.QFont("Helvetica", self.font_size, QtGui.QFont.Weight.Bold))
+        # Qt entfernt die ältesten Blöcke selbst, sobald das Limit erreicht ist
+        text_edit.document().setMaximumBlockCount(self.max_lines + 1)
+        text_edit.setStyleSheet(
+            f"background-color: {'#3E3E3E' if self.dark_mode else '#FFFFFF'};"  # keine 'color:' hier
+        )
+        return text_edit
+
     def load_overlay_settings(self):
-        try:
-            if os.path.exists(self.SETTINGS_FILE):
-                with open(self.SETTINGS_FILE, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    pos = data.get("pos")
-                    size = data.get("size")
-                    if pos:
-                        self.move(pos[0], pos[1])
-                    if size:
-                        self.resize(size[0], size[1])
-        except Exception:
-            pass
+        if not self.settings:
+            return
+        pos = self.settings.get("overlay_pos")
+        size = self.settings.get("overlay_size")
+        if pos:
+            self.move(pos[0], pos[1])
+        if size:
+            self.resize(size[0], size[1])
 
     def save_overlay_settings(self):
-        try:
-            data = {
-                "pos": [self.x(), self.y()],
-                "size": [self.width(), self.height()]
-            }
-            with open(self.SETTINGS_FILE, "w", encoding="utf-8") as f:
-                json.dump(data, f)
-        except Exception:
-            pass
+        # Schreibt nicht sofort, der SettingsStore bündelt die Änderungen
+        if not self.settings:
+            return
+        self.settings.update(
+            overlay_pos=[self.x(), self.y()],
+            overlay_size=[self.width(), self.height()]
+        )
 
     def moveEvent(self, event):
         self.save_overlay_settings()
@@ -547,34 +3157,56 @@ class OverlayWindow(QtWidgets.QWidget):
 
     def change_font_size(self, delta):
         self.font_size = max(6, self.font_size + delta)
-        self.text_edit.setFont(QtGui.QFont("Helvetica", self.font_size, QtGui.QFont.Weight.Bold))
+        for text_edit in self.columns.text_edits.values():
+            text_edit.setFont(QtGui.QFont("Helvetica", self.font_size, QtGui.QFont.Weight.Bold))
+
+    def append_translations(self, view, translations):
+        self.columns.append_translations(translations)
 
 class App(QtWidgets.QMainWindow):
+    # Gemeinsamer Nachrichtenstrom: (Tab-Ansicht, {Sprache: [(Zeile, Typ), ...]})
+    translations_ready = QtCore.pyqtSignal(object, dict)
+    # (Generation, Text, noch nicht übersetzter Rest, Future) aus dem Worker-Thread zurück in den GUI-Thread
+    manual_translation_ready = QtCore.pyqtSignal(int, str, str, object)
+    MAX_TAB_LINES = 50
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Train Driver 2 Translation Helper 0.4.1")
+        self.settings = SettingsStore(parent=self)
         self.overlay_window = None
-        self.overlay_font_size = 10
+        self.overlay_font_size = self.settings.get("overlay_font_size", 10)
 
         icon_path = resource_path(os.path.join('res', 'Favicon.ico'))
         if os.path.exists(icon_path):
             self.setWindowIcon(QtGui.QIcon(icon_path))
 
-        self.ignore_list = load_ignore_list(resource_path(os.path.join('res', 'ignore_list.csv')))
-        self.fixed_translations = load_fixed_translations(resource_path(os.path.join('res', 'fixed_translations.csv')))
-        self.scenery_names = load_scenery_names(resource_path(os.path.join('res', 'Scenery_Names.csv')))
+        self.filter_engine = load_ignore_list(resource_path(os.path.join('res', 'ignore_list.csv')))
 
-        self.language_var = "English"
-        self.service_var = "Deepl"
+        self.language_var = self.settings.get("language", "English")
+        self.extra_languages = list(self.settings.get("extra_languages", []))
+        self.service_var = self.settings.get("service", "Deepl")
         self.is_dark_mode = True
-        self.enable_driver_warning = True
+        self.enable_driver_warning = self.settings.get("driver_warnings", True)
+        self.my_names = self.parse_names(self.settings.get("my_names", ""))
+        self.engine = build_translation_engine()
         self.manual_translator = ManualTranslator(
             lambda: self.language_var,
             lambda: self.service_var,
-            self.fixed_translations,
-            self.scenery_names
+            self.engine
         )
         self.last_manual_translation = ""
+        self.manual_generation = 0
+        self.manual_future = None
+        # Live-Vorschau beim Tippen: kurze Pause -> abgeschlossene Wörter, längere Pause -> ganzer Text
+        self.live_preview_timer = QtCore.QTimer(self)
+        self.live_preview_timer.setSingleShot(True)
+        self.live_preview_timer.timeout.connect(self.update_live_preview)
+        self.live_idle_timer = QtCore.QTimer(self)
+        self.live_idle_timer.setSingleShot(True)
+        self.live_idle_timer.timeout.connect(lambda: self.update_live_preview(full=True))
+        self.live_preview_next = 0.0
+        self.live_preview_shown = None
 
         self.handlers = []
         self.opened_logs = set()
@@ -582,18 +3214,120 @@ class App(QtWidgets.QMainWindow):
         self.directory_path = ""
         self.known_logs = {}
         self.tab_widget = None
+        self.global_hotkey_listener = None
+        self.metrics_dialog = None
+        self.engine_process = None
+        self.session_name = new_session_name()
+        self.archive = None
+        self.archive_views = []
+        self.search_index = None
+        self.search_dialog = None
+        self.timeline_view = None
+        self.history = None
+        self.tab_lines = config.getint('history', 'tab_lines', fallback=self.MAX_TAB_LINES)
         self.init_ui()
         self.apply_theme()
-        self.global_hotkey_listener = pynput_keyboard.Listener(on_press=self._on_global_key)
-        self.global_hotkey_listener.start()
         f10_shortcut = QtGui.QShortcut(QtGui.QKeySequence("F10"), self)
         f10_shortcut.activated.connect(self.toggle_overlay)
-        self._overlay_sync_state = {}
-        self.start_update_check()
+        search_shortcut = QtGui.QShortcut(QtGui.QKeySequence("Ctrl+F"), self)
+        search_shortcut.activated.connect(self.show_search)
+        self.translations_ready.connect(self.display_translations)
+        self.manual_translation_ready.connect(self.show_manual_translation)
+        # Verbrauch des gewählten Dienstes in der Statusleiste, Rate aus den Stichproben der letzten 15 Minuten
+        self.usage_label = QtWidgets.QLabel()
+        self.statusBar().addPermanentWidget(self.usage_label)
+        self.usage_samples = deque()
+        self.usage_timer = QtCore.QTimer(self)
+        self.usage_timer.timeout.connect(self.update_usage_label)
+        self.usage_timer.start(5000)
+        self.resource_watcher = ResourceWatcher()
+        self.reload_timer = QtCore.QTimer(self)
+        self.reload_timer.timeout.connect(self.reload_changed_resources)
+        if config.getboolean('reload', 'enabled', fallback=True):
+            self.reload_timer.start(config.getint('reload', 'interval_ms', fallback=2000))
+        startup_profile.mark("main window built")
+        # Alles, was nicht für das erste Fenster nötig ist, läuft nach dem ersten Event-Loop-Durchlauf
+        QtCore.QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        startup_profile.mark("event loop running")
+        startup_profile.startup_done = True
+        if config.getboolean('engine', 'separate_process', fallback=False):
+            self.start_engine_process()
+        elif self.service_var == LOCAL_SERVICE:
+            warm_up_local(self.target_languages())
+        if config.getboolean('archive', 'enabled', fallback=True):
+            self.archive = SessionArchive.new_session(self.session_name)
+        self.history = HistoryStore(config.getint('history', 'memory_mb', fallback=32) * 1024 * 1024)
+        if config.getboolean('search', 'enabled', fallback=True):
+            try:
+                os.makedirs(archive_directory(), exist_ok=True)
+                self.search_index = SearchIndex(os.path.join(archive_directory(), "search.sqlite"), self.session_name)
+            except Exception:
+                metrics.incr("search.errors")
+        self.restore_session()
+        self.start_global_hotkeys()
+        startup_profile.mark("session restored")
+        startup_profile.write_report()
+        QtCore.QTimer.singleShot(3000, self.start_update_check)
+
+    def start_engine_process(self):
+        self.engine_process = EngineProcess({
+            "languages": self.target_languages(),
+            "service": self.service_var,
+            "my_names": self.my_names,
+            "driver_warnings": self.enable_driver_warning,
+        }, parent=self)
+        self.engine_process.events_ready.connect(self.display_engine_events)
+
+    def display_engine_events(self, log_file_path, events):
+        for handler, view, timer, tab_idx in self.handlers:
+            if handler.log_file_path == log_file_path:
+                if any(event.kind == "warning" for event in events):
+                    LogHandler.play_sound()
+                self.publish_events(view, events)
+                return
+
+    def publish_events(self, view, events):
+        if self.archive:
+            self.archive.append(events)
+        if self.search_index:
+            self.search_index.add(self.session_name, events)
+        if self.history is not None:
+            self.history.append(events)
+        if self.timeline_view is not None:
+            self.timeline_view.insert_events(events)
+        self.translations_ready.emit(view, events_to_lines(events, self.target_languages()))
+
+    def update_timeline_view(self):
+        # "All"-Tab, sobald mehr als ein Log offen ist
+        if self.timeline_view is not None or len(self.handlers) < 2:
+            return
+        if not config.getboolean('timeline', 'enabled', fallback=True):
+            return
+        max_lines = config.getint('timeline', 'max_lines', fallback=200)
+        self.timeline_view = TimelineView(lambda: self.make_tab_text_edit(max_lines), self.target_languages(), max_lines)
+        self.rebuild_timeline()
+        self.tab_widget.insertTab(0, self.timeline_view, "All")
+
+    def rebuild_timeline(self):
+        count = self.timeline_view.merger.max_events
+        self.timeline_view.rebuild([self.history.recent(os.path.basename(handler.log_file_path), count)
+                                    for handler, view, timer, tab_idx in self.handlers] if self.history is not None else [])
+
+    def start_global_hotkeys(self):
+        try:
+            with startup_profile.measure("pynput"):
+                from pynput import keyboard as pynput_keyboard
+        except Exception:
+            return
+        self._pynput_keyboard = pynput_keyboard
+        self.global_hotkey_listener = pynput_keyboard.Listener(on_press=self._on_global_key)
+        self.global_hotkey_listener.start()
 
     def _on_global_key(self, key):
         try:
-            if key == pynput_keyboard.Key.f10:
+            if key == self._pynput_keyboard.Key.f10:
                 QtCore.QTimer.singleShot(0, self.toggle_overlay)
         except Exception:
             pass
@@ -607,9 +3341,11 @@ class App(QtWidgets.QMainWindow):
         top_layout = QtWidgets.QHBoxLayout()
         img_path = resource_path(os.path.join('res', 'image.png'))
         if os.path.exists(img_path):
-            img = Image.open(img_path).resize((80, 40), Image.LANCZOS)
-            qt_img = ImageQt.ImageQt(img)
-            pixmap = QtGui.QPixmap.fromImage(qt_img)
+            pixmap = QtGui.QPixmap(img_path).scaled(
+                80, 40,
+                QtCore.Qt.AspectRatioMode.IgnoreAspectRatio,
+                QtCore.Qt.TransformationMode.SmoothTransformation
+            )
             img_label = QtWidgets.QLabel()
             img_label.setPixmap(pixmap)
             top_layout.addWidget(img_label)
@@ -636,16 +3372,37 @@ class App(QtWidgets.QMainWindow):
         self.language_combobox = QtWidgets.QComboBox()
         self.language_combobox.addItems(language_values)
         self.language_combobox.setCurrentText(self.language_var)
-        self.language_combobox.currentTextChanged.connect(lambda val: setattr(self, "language_var", val))
+        self.language_combobox.currentTextChanged.connect(self.set_language)
         frame2.addWidget(self.language_combobox)
 
+        # Zusätzliche Zielsprachen, jede bekommt eine eigene Spalte in Tabs und Overlay
+        self.extra_languages_button = QtWidgets.QToolButton()
+        self.extra_languages_button.setPopupMode(QtWidgets.QToolButton.ToolButtonPopupMode.InstantPopup)
+        self.extra_languages_button.setToolTip("Translate every message into these languages as well")
+        extra_languages_menu = QtWidgets.QMenu(self.extra_languages_button)
+        for language in language_values:
+            action = extra_languages_menu.addAction(language)
+            action.setCheckable(True)
+            action.setChecked(language in self.extra_languages)
+            action.toggled.connect(lambda checked, language=language: self.set_extra_language(language, checked))
+        self.extra_languages_button.setMenu(extra_languages_menu)
+        self.update_extra_languages_button()
+        frame2.addWidget(self.extra_languages_button)
+
         frame2.addWidget(QtWidgets.QLabel("Translation Service:"))
-        service_values = ["ChatGPT", "Google Translate", "Deepl"]
+        service_values = ["ChatGPT", "Google Translate", "Deepl", LOCAL_SERVICE]
         self.service_combobox = QtWidgets.QComboBox()
         self.service_combobox.addItems(service_values)
         self.service_combobox.setCurrentText(self.service_var)
-        self.service_combobox.currentTextChanged.connect(lambda val: setattr(self, "service_var", val))
+        self.service_combobox.currentTextChanged.connect(self.set_service)
         frame2.addWidget(self.service_combobox)
+
+        frame2.addWidget(QtWidgets.QLabel("My Name/ID:"))
+        self.my_names_entry = QtWidgets.QLineEdit(self.settings.get("my_names", ""))
+        self.my_names_entry.setPlaceholderText("e.g. BravuraLion, 195991")
+        self.my_names_entry.setToolTip("Messages mentioning these names are translated first")
+        self.my_names_entry.textChanged.connect(self.set_my_names)
+        frame2.addWidget(self.my_names_entry)
         main_layout.addLayout(frame2)
 
         # Frame3
@@ -663,9 +3420,20 @@ class App(QtWidgets.QMainWindow):
         aminus_btn.clicked.connect(lambda: self.change_overlay_font_size(-1))
         frame3.addWidget(aminus_btn)
         self.warning_checkbox = QtWidgets.QCheckBox("Driver Warnings")
-        self.warning_checkbox.setChecked(True)
-        self.warning_checkbox.stateChanged.connect(lambda state: setattr(self, "enable_driver_warning", state == QtCore.Qt.CheckState.Checked))
+        self.warning_checkbox.setChecked(self.enable_driver_warning)
+        self.warning_checkbox.toggled.connect(self.set_driver_warning)
         frame3.addWidget(self.warning_checkbox)
+        metrics_btn = QtWidgets.QPushButton("Metrics")
+        metrics_btn.clicked.connect(self.show_metrics)
+        frame3.addWidget(metrics_btn)
+        search_btn = QtWidgets.QPushButton("Search")
+        search_btn.setToolTip("Search the chat history of all sessions (Ctrl+F)")
+        search_btn.clicked.connect(self.show_search)
+        frame3.addWidget(search_btn)
+        archive_btn = QtWidgets.QPushButton("Open Session")
+        archive_btn.setToolTip("Load an archived session into a new tab")
+        archive_btn.clicked.connect(self.open_archived_session)
+        frame3.addWidget(archive_btn)
 
 
         main_layout.addLayout(frame3)
@@ -677,9 +3445,20 @@ class App(QtWidgets.QMainWindow):
         self.manual_input = QtWidgets.QLineEdit()
         self.manual_input.setPlaceholderText("Enter text to translate...")
         self.manual_input.returnPressed.connect(self.handle_manual_translate)
-        self.manual_input.textChanged.connect(self.clear_manual_translation)
+        self.manual_input.textChanged.connect(self.on_manual_text_changed)
         self.manual_input.installEventFilter(self)
         manual_input_layout.addWidget(self.manual_input)
+        self.manual_progress = QtWidgets.QProgressBar()
+        self.manual_progress.setRange(0, 0)
+        self.manual_progress.setTextVisible(False)
+        self.manual_progress.setMaximumWidth(60)
+        self.manual_progress.hide()
+        manual_input_layout.addWidget(self.manual_progress)
+        self.live_preview_checkbox = QtWidgets.QCheckBox("As you type")
+        self.live_preview_checkbox.setToolTip("Show a translation preview while typing")
+        self.live_preview_checkbox.setChecked(self.settings.get("live_preview", False))
+        self.live_preview_checkbox.toggled.connect(self.set_live_preview)
+        manual_input_layout.addWidget(self.live_preview_checkbox)
         manual_layout.addLayout(manual_input_layout)
 
         self.manual_translation_display = TranslationDisplay()
@@ -695,17 +3474,156 @@ class App(QtWidgets.QMainWindow):
         self.tab_widget.setMovable(True)
         self.tab_widget.tabCloseRequested.connect(self.close_selected_tab)
         main_layout.addWidget(self.tab_widget)
+    def show_metrics(self):
+        if self.metrics_dialog is None:
+            self.metrics_dialog = MetricsDialog(self)
+        self.metrics_dialog.show()
+        self.metrics_dialog.raise_()
+
+    def reload_changed_resources(self):
+        # Der Engine-Prozess hat einen eigenen Watcher und lädt seine Kopie selbst neu
+        changed = self.resource_watcher.changed()
+        if not changed:
+            return
+        filter_engine = reload_resources(changed, self.engine)
+        if filter_engine is not None:
+            self.filter_engine = filter_engine
+            for handler, view, timer, tab_idx in self.handlers:
+                if isinstance(handler, LogHandler):
+                    handler.filter_engine = filter_engine
+        self.statusBar().showMessage("Reloaded " + ", ".join(ResourceWatcher.FILES[name] for name in sorted(changed)), 5000)
+
+    def update_usage_label(self):
+        usage.refresh_async()
+        service = self.service_var
+        unit = usage.unit(service)
+        used = usage.usage(service, unit)
+        now = time.monotonic()
+        self.usage_samples.append((now, service, used))
+        while self.usage_samples and (now - self.usage_samples[0][0] > 900 or self.usage_samples[0][1] != service):
+            self.usage_samples.popleft()
+        first_time, _, first_used = self.usage_samples[0]
+        rate = (used - first_used) / (now - first_time) * 3600 if now - first_time >= 60 else None
+        short = "tok" if unit == "tokens" else "chars"
+        text = f"{service}: {used:,} {short} today"
+        if rate is not None:
+            text += f", {rate:,.0f}/h"
+        cost = usage.cost(service)
+        if cost:
+            text += f", ≈{cost:.2f} {config.get('budget', 'currency', fallback='€')}"
+        limit = config.getint(f"budget.{service}", "day_hard", fallback=0)
+        if limit:
+            text += f" ({used * 100 // limit}% of daily budget)"
+        routed = usage.route(service, count=False)
+        if routed != service:
+            text += f" → {routed or 'cache only'} (budget)"
+        text += f" · saved {usage.usage(UsageLedger.SAVED):,} chars"
+        self.usage_label.setText(text)
+        metrics.set(f"usage.{service}.today", used)
+
+    def show_search(self):
+        if self.search_index is None:
+            QtWidgets.QMessageBox.information(self, "Search", "The search index is disabled or unavailable.")
+            return
+        if self.search_dialog is None:
+            self.search_dialog = SearchDialog(self.search_index, lambda: self.language_var, self)
+        self.search_dialog.show()
+        self.search_dialog.raise_()
+        self.search_dialog.text_input.setFocus()
+
+    def set_language(self, value):
+        self.language_var = value
+        self.settings.set("language", value)
+        self.update_language_views()
+
+    def target_languages(self):
+        languages = [self.language_var]
+        languages += [language for language in self.extra_languages if language not in languages]
+        return languages
+
+    def set_extra_language(self, language, checked):
+        if checked and language not in self.extra_languages:
+            self.extra_languages.append(language)
+        elif not checked and language in self.extra_languages:
+            self.extra_languages.remove(language)
+        self.settings.set("extra_languages", self.extra_languages)
+        self.update_extra_languages_button()
+        self.update_language_views()
+
+    def update_extra_languages_button(self):
+        self.extra_languages_button.setText(
+            "+ " + ", ".join(self.extra_languages) if self.extra_languages else "Also translate to..."
+        )
+
+    def update_language_views(self):
+        languages = self.target_languages()
+        for handler, view, timer, tab_idx in self.handlers:
+            view.set_languages(languages)
+        if self.timeline_view is not None:
+            self.timeline_view.set_languages(languages)
+            self.rebuild_timeline()
+        if self.overlay_window:
+            self.overlay_window.columns.set_languages(languages)
+        if self.engine_process:
+            self.engine_process.update(languages=languages)
+
+    def set_service(self, value):
+        self.service_var = value
+        self.settings.set("service", value)
+        if value == LOCAL_SERVICE and not self.engine_process:
+            warm_up_local(self.target_languages())
+        if self.engine_process:
+            self.engine_process.update(service=value)
+
+    @staticmethod
+    def parse_names(value):
+        return {name.casefold() for name in re.split(r"[,\s]+", value) if name}
+
+    def set_my_names(self, value):
+        self.my_names = self.parse_names(value)
+        self.settings.set("my_names", value)
+        if self.engine_process:
+            self.engine_process.update(my_names=self.my_names)
+
+    def set_driver_warning(self, checked):
+        self.enable_driver_warning = checked
+        self.settings.set("driver_warnings", checked)
+        if self.engine_process:
+            self.engine_process.update(driver_warnings=checked)
+
+    def save_open_tabs(self):
+        self.settings.set("open_tabs", [handler.log_file_path for handler, _, _, _ in self.handlers])
+
+    def restore_session(self):
+        directory_path = self.settings.get("log_directory")
+        if not directory_path or not os.path.isdir(directory_path):
+            return
+        tabs = [path for path in self.settings.get("open_tabs", []) if os.path.isfile(path)]
+        self.start_directory(directory_path, tabs)
+
     def browse_directory(self):
         dialog = QtWidgets.QFileDialog(self)
-        directory_path = dialog.getExistingDirectory(self, "Select Log Directory", os.path.expanduser("~/Documents/TTSK/TrainDriver2/Logs"))
+        start_dir = self.settings.get("log_directory") or os.path.expanduser("~/Documents/TTSK/TrainDriver2/Logs")
+        directory_path = dialog.getExistingDirectory(self, "Select Log Directory", start_dir)
         if directory_path:
-            self.directory_path = directory_path
-            self.file_entry.setText(directory_path)
+            self.start_directory(directory_path)
+
+    def start_directory(self, directory_path, tabs=None):
+        first_start = not self.directory_path
+        self.directory_path = directory_path
+        self.file_entry.setText(directory_path)
+        self.settings.set("log_directory", directory_path)
+        if tabs:
+            for path in tabs:
+                self.open_log_in_new_tab(path)
+            self.latest_log_time = max(os.path.getctime(path) for path in tabs)
+        else:
             newest = self.find_newest_log_file(directory_path)
             if newest:
                 self.open_log_in_new_tab(newest)
                 self.latest_log_time = os.path.getctime(newest)
-            self.record_all_logs()
+        self.record_all_logs()
+        if first_start:
             self.monitor_new_logs()
 
     def record_all_logs(self):
@@ -727,21 +3645,25 @@ class App(QtWidgets.QMainWindow):
         if log_file_path in self.opened_logs:
             return
         self.opened_logs.add(log_file_path)
-        text_area = QtWidgets.QTextEdit()
-        text_area.setReadOnly(True)
-        text_area.setFont(QtGui.QFont("Helvetica", 10))
-        idx = self.tab_widget.addTab(text_area, os.path.basename(log_file_path))
+        view = LanguageColumns(lambda: self.make_tab_text_edit(self.tab_lines), self.target_languages())
+        idx = self.tab_widget.addTab(view, os.path.basename(log_file_path))
+        if self.engine_process:
+            # Tailing und Übersetzung laufen im Engine-Prozess, die Events kommen über display_engine_events
+            self.handlers.append((RemoteLogHandler(log_file_path, self.engine_process), view, None, idx))
+            self.save_open_tabs()
+            self.update_timeline_view()
+            return
         handler = LogHandler(
             log_file_path=log_file_path,
-            language_var=lambda: self.language_var,
+            language_var=self.target_languages,
             service_var=lambda: self.service_var,
-            ignore_list=self.ignore_list,
-            fixed_translations=self.fixed_translations,
-            scenery_names=self.scenery_names,
-            enable_driver_warning=lambda: self.warning_checkbox.isChecked()
+            filter_engine=self.filter_engine,
+            engine=self.engine,
+            enable_driver_warning=lambda: self.warning_checkbox.isChecked(),
+            my_names=lambda: self.my_names
         )
         handler.setParent(self)
-        handler.lines_translated.connect(lambda lines: self.process_lines(handler, text_area, lines))
+        handler.lines_translated.connect(lambda lines: self.process_lines(handler, view, lines))
         handler.file.seek(0, os.SEEK_END)
         latest_message = None
         while True:
@@ -758,7 +3680,37 @@ class App(QtWidgets.QMainWindow):
         timer = QtCore.QTimer(self)
         timer.timeout.connect(handler.check_new_lines)
         timer.start(5000)
-        self.handlers.append((handler, text_area, timer, idx))
+        self.handlers.append((handler, view, timer, idx))
+        self.save_open_tabs()
+        self.update_timeline_view()
+
+    def make_tab_text_edit(self, max_lines=MAX_TAB_LINES):
+        text_area = QtWidgets.QTextEdit()
+        text_area.setReadOnly(True)
+        text_area.setFont(QtGui.QFont("Helvetica", 10))
+        if max_lines:
+            text_area.document().setMaximumBlockCount(max_lines + 1)
+        return text_area
+
+    def open_archived_session(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Open Session", archive_directory(), f"Session archives (*{ARCHIVE_SUFFIX})")
+        if path:
+            self.load_archived_session(path)
+
+    def load_archived_session(self, path):
+        # Gespeicherte Übersetzungen anzeigen, nichts wird neu übersetzt
+        reader = ArchiveReader(path)
+        max_lines = config.getint('archive', 'reload_lines', fallback=5000)
+        events = reader.events(max(0, len(reader) - max_lines))
+        languages = self.target_languages()
+        for event in events:
+            languages += [language for language in event.translations if language not in languages]
+        view = LanguageColumns(lambda: self.make_tab_text_edit(max_lines), languages)
+        view.append_translations(events_to_lines(events, languages))
+        self.archive_views.append(view)
+        idx = self.tab_widget.addTab(view, os.path.basename(path)[:-len(ARCHIVE_SUFFIX)])
+        self.tab_widget.setCurrentIndex(idx)
 
     def monitor_new_logs(self):
         if self.directory_path:
@@ -797,13 +3749,89 @@ class App(QtWidgets.QMainWindow):
             self.clear_manual_translation()
             return
 
-        translation = self.manual_translator.translate(text)
+        self.live_preview_timer.stop()
+        self.live_idle_timer.stop()
+        self.start_manual_translation(text)
+
+    def start_manual_translation(self, text, remainder=""):
+        # Läuft im Hintergrund; ein neuer Auftrag macht den vorherigen ungültig
+        self.cancel_manual_translation()
+        generation = self.manual_generation
+        self.manual_future = self.manual_translator.submit(text)
+        self.manual_progress.show()
+        self.manual_future.add_done_callback(
+            lambda future: self.manual_translation_ready.emit(generation, text, remainder, future))
+
+    def set_live_preview(self, checked):
+        self.settings.set("live_preview", checked)
+        self.on_manual_text_changed(self.manual_input.text())
+
+    def on_manual_text_changed(self, value):
+        if not self.live_preview_checkbox.isChecked() or not value.strip():
+            self.live_preview_timer.stop()
+            self.live_idle_timer.stop()
+            self.clear_manual_translation()
+            return
+        # Die alte Vorschau bleibt sichtbar, bis die neue da ist
+        self.cancel_manual_translation()
+        self.last_manual_translation = ""
+        self.live_preview_timer.start(config.getint('live_translation', 'debounce_ms', fallback=300))
+        self.live_idle_timer.start(config.getint('live_translation', 'idle_ms', fallback=1200))
+
+    def update_live_preview(self, full=False):
+        value = self.manual_input.text()
+        text, remainder = value.strip(), ""
+        if not full and not re.search(r'[\s.,!?;:]$', value):
+            # Nur abgeschlossene Wörter, das angefangene Wort löst keine neue Anfrage aus
+            text, _, remainder = text.rpartition(" ")
+            text = text.strip()
+        if len(text) < 2 or (text, remainder) == self.live_preview_shown:
+            return
+        wait = self.live_preview_next - time.monotonic()
+        if wait > 0:
+            # Mindestabstand zwischen Vorschau-Anfragen, damit Tippen die API-Nutzung nicht vervielfacht
+            (self.live_idle_timer if full else self.live_preview_timer).start(int(wait * 1000) + 1)
+            return
+        self.live_preview_next = time.monotonic() + config.getint('live_translation', 'min_interval_ms', fallback=1000) / 1000
+        metrics.incr("live_preview.requests")
+        self.start_manual_translation(text, remainder)
+
+    def cancel_manual_translation(self):
+        self.manual_generation += 1
+        if self.manual_future is not None:
+            # Noch wartende Aufträge fliegen aus der Warteschlange, laufende werden ignoriert
+            self.manual_future.cancel()
+            self.manual_future = None
+        self.manual_progress.hide()
+
+    def show_manual_translation(self, generation, text, remainder, future):
+        if generation != self.manual_generation or future.cancelled():
+            return
+        self.manual_future = None
+        self.manual_progress.hide()
+        self.live_preview_shown = (text, remainder)
+        try:
+            translation = future.result()
+        except Exception as e:
+            if not isinstance(e, TranslationError):
+                # Ungeprüfte SDK- oder Netzwerkfehler wie die typisierten markieren, sonst bleibt die Box leer
+                e = classify_error(e, self.service_var, error_status(e))
+                metrics.incr(f"errors.{self.service_var}.{e.reason}")
+            self.last_manual_translation = ""
+            self.manual_translation_display.setPlainText(f"{text} {e.marker()}")
+            return
         translation = re.sub(r'【[^】]*】', '', translation).strip()
+        if remainder:
+            # Vorschau: das angefangene letzte Wort steht noch im Original dahinter
+            self.manual_translation_display.setPlainText(f"{translation} {remainder}")
+            return
         self.last_manual_translation = translation
         self.manual_translation_display.setPlainText(translation)
 
     def clear_manual_translation(self):
+        self.cancel_manual_translation()
         self.last_manual_translation = ""
+        self.live_preview_shown = None
         self.manual_translation_display.clear()
 
     def eventFilter(self, obj, event):
@@ -822,13 +3850,13 @@ class App(QtWidgets.QMainWindow):
 
 
 
-    def process_lines(self, handler, text_area, lines):
+    def process_lines(self, handler, view, lines):
         thread = QtCore.QThread()
         worker = TranslationWorker(handler, lines)
         worker.moveToThread(thread)
 
-        def on_finished(result):
-            self.display_translations(text_area, result)
+        def on_finished(events):
+            self.publish_events(view, events)
             thread.quit()
             thread.wait()
             thread.deleteLater()
@@ -850,15 +3878,26 @@ class App(QtWidgets.QMainWindow):
     def close_selected_tab(self, idx=None):
         if idx is None:
             idx = self.tab_widget.currentIndex()
-        if idx == -1 or idx >= len(self.handlers):
+        if idx == -1:
+            return
+        # Tabs sind verschiebbar und Archiv-Tabs haben keinen Handler, daher über das Widget suchen
+        widget = self.tab_widget.widget(idx)
+        if widget is self.timeline_view:
+            self.timeline_view = None
+            self.tab_widget.removeTab(idx)
+            return
+        if widget in self.archive_views:
+            self.archive_views.remove(widget)
+            self.tab_widget.removeTab(idx)
+            return
+        position = next((i for i, entry in enumerate(self.handlers) if entry[1] is widget), None)
+        if position is None:
             return
 
-        handler, text_area, timer, tab_idx = self.handlers[idx]
-        handler.stop_event.set()
-
-        if handler.file:
-            handler.file.close()
-        timer.stop()
+        handler, view, timer, tab_idx = self.handlers[position]
+        handler.close()
+        if timer:
+            timer.stop()
 
         if hasattr(handler, "active_threads"):
             for thread, worker in handler.active_threads:
@@ -876,7 +3915,8 @@ class App(QtWidgets.QMainWindow):
 
 
         self.tab_widget.removeTab(idx)
-        del self.handlers[idx]
+        del self.handlers[position]
+        self.save_open_tabs()
 
     def start_update_check(self):
         t = QtCore.QThread(self)
@@ -886,6 +3926,8 @@ class App(QtWidgets.QMainWindow):
 
     def _do_update_check(self, thread):
         try:
+            import requests
+            from packaging import version
             resp = requests.get(
                 "https://api.github.com/repos/bravuralion/TD2-Chat-Translator/releases/latest",
                 timeout=3  # hartes Timeout
@@ -914,11 +3956,10 @@ class App(QtWidgets.QMainWindow):
             os.startfile(download_url)
 
     def closeEvent(self, event):
-        for handler, text_area, timer, tab_idx in self.handlers:
-            handler.stop_event.set()
-            if handler.file:
-                handler.file.close()
-            timer.stop()
+        for handler, view, timer, tab_idx in self.handlers:
+            handler.close()
+            if timer:
+                timer.stop()
 
             if hasattr(handler, "active_threads"):
                 for thread, worker in handler.active_threads:
@@ -928,43 +3969,62 @@ class App(QtWidgets.QMainWindow):
                 handler.active_threads.clear()
 
         if self.overlay_window:
-            self.overlay_window.close()
-            self.overlay_window = None
-
+            self.close_overlay()
+
+        if self.global_hotkey_listener:
+            self.global_hotkey_listener.stop()
+        if self.engine_process:
+            self.engine_process.stop()
+        if self.archive:
+            self.archive.close()
+        if self.search_index:
+            self.search_index.close()
+        usage.flush()
+        self.settings.close()
+        startup_profile.write_report()
+
+    def close_overlay(self):
+        try:
+            self.translations_ready.disconnect(self.overlay_window.append_translations)
+        except TypeError:
+            pass
+        self.overlay_window.close()
+        self.overlay_window = None
 
     def toggle_overlay(self):
         if self.overlay_window and self.overlay_window.isVisible():
-            self.overlay_window.close()
-            self.overlay_window = None
+            self.close_overlay()
         else:
-            self.overlay_window = OverlayWindow(dark_mode=self.is_dark_mode, font_size=self.overlay_font_size)
+            if self.overlay_window:
+                self.close_overlay()
+            self.overlay_window = OverlayWindow(dark_mode=self.is_dark_mode, font_size=self.overlay_font_size,
+                                                settings=self.settings, languages=self.target_languages())
+            self.translations_ready.connect(self.overlay_window.append_translations)
             self.overlay_window.show()
             # Zeige nur die zuletzt aktive Tab-Übersetzung im Overlay
-            current_tab = self.tab_widget.currentIndex()
-            if current_tab != -1:
-                handler, text_area, timer, tab_idx = self.handlers[current_tab]
-                self.start_overlay_sync(text_area)
+            view = self.tab_widget.currentWidget()
+            if view is not None:
+                self.start_overlay_sync(view)
 
-    def start_overlay_sync(self, source_text_widget):
+    def start_overlay_sync(self, source_view):
         if not self.overlay_window or not self.overlay_window.isVisible():
             return
 
-        # Initialen Full-Sync (formatiert) durchführen
-        src_cur = source_text_widget.textCursor()
-        src_cur.movePosition(QtGui.QTextCursor.MoveOperation.Start)
-        src_cur.movePosition(QtGui.QTextCursor.MoveOperation.End, QtGui.QTextCursor.MoveMode.KeepAnchor)
-        fragment = QtGui.QTextDocumentFragment(src_cur)
-
-        self.overlay_window.text_edit.clear()
-        ov_cur = self.overlay_window.text_edit.textCursor()
-        ov_cur.insertFragment(fragment)
-        self.overlay_window.text_edit.setTextCursor(ov_cur)
-        self.overlay_window.text_edit.ensureCursorVisible()
-
-        # Overlay-Status merken
-        self._overlay_sync_state[source_text_widget] = {
-            "last_blocks": source_text_widget.document().blockCount()
-        }
+        # Einmaliger Sync beim Öffnen, danach kommen nur noch neue Zeilen über translations_ready
+        for language, source_text_widget in source_view.text_edits.items():
+            overlay_text_edit = self.overlay_window.columns.text_edits.get(language)
+            if overlay_text_edit is None:
+                continue
+            src_cur = source_text_widget.textCursor()
+            src_cur.movePosition(QtGui.QTextCursor.MoveOperation.Start)
+            src_cur.movePosition(QtGui.QTextCursor.MoveOperation.End, QtGui.QTextCursor.MoveMode.KeepAnchor)
+            fragment = QtGui.QTextDocumentFragment(src_cur)
+
+            overlay_text_edit.clear()
+            ov_cur = overlay_text_edit.textCursor()
+            ov_cur.insertFragment(fragment)
+            overlay_text_edit.setTextCursor(ov_cur)
+            overlay_text_edit.ensureCursorVisible()
 
 
     def change_overlay_font_size(self, delta):
@@ -972,64 +4032,352 @@ class App(QtWidgets.QMainWindow):
             return
         self.overlay_font_size = max(6, self.overlay_font_size + delta)
         self.overlay_window.change_font_size(delta)
-    def display_translations(self, text_area, translated_lines):
-        max_lines = 50
-        cursor = text_area.textCursor()
-        cursor.movePosition(QtGui.QTextCursor.MoveOperation.End)
-        insert_start = cursor.position()
-
-        for line, line_type in translated_lines:
-            fmt = QtGui.QTextCharFormat()
-            if line_type == "fahrdienstleiter":
-                fmt.setForeground(QtGui.QColor("#DF7676"))
-                fmt.setFontWeight(QtGui.QFont.Weight.Bold)
-            elif line_type == "translated":
-                fmt.setForeground(QtGui.QColor("orange"))
-                fmt.setFontWeight(QtGui.QFont.Weight.Bold)
-            elif line_type == "swdr":
-                fmt.setForeground(QtGui.QColor("green"))
-                fmt.setFontWeight(QtGui.QFont.Weight.Bold)
-            elif line_type == "warning":
-                fmt.setForeground(QtGui.QColor("red"))
-                fmt.setFontWeight(QtGui.QFont.Weight.Bold)
+        self.settings.set("overlay_font_size", self.overlay_font_size)
+    def display_translations(self, view, translations):
+        # Alte Zeilen entfernt das Dokument selbst (setMaximumBlockCount), kein Resync nötig
+        view.append_translations(translations)
+
+def websocket_frame(payload, opcode=0x1):
+    # Server-Frames sind unmaskiert, FIN-Bit gesetzt
+    length = len(payload)
+    if length < 126:
+        header = bytes([0x80 | opcode, length])
+    elif length < 65536:
+        header = bytes([0x80 | opcode, 126]) + length.to_bytes(2, "big")
+    else:
+        header = bytes([0x80 | opcode, 127]) + length.to_bytes(8, "big")
+    return header + payload
+
+
+class FeedSubscriber:
+    MAX_BACKLOG = 1000
+
+    def __init__(self, frames):
+        self.frames = deque(frames)
+        self.closed = False
+        self.condition = Condition()
+
+    def push(self, frames):
+        with self.condition:
+            if len(self.frames) >= self.MAX_BACKLOG:
+                # Client kommt nicht hinterher: trennen statt unbegrenzt zu puffern
+                self.closed = True
             else:
-                fmt.setForeground(QtGui.QColor("white"))
+                self.frames.append(frames)
+            self.condition.notify()
+
+    def next_frames(self, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.frames or self.closed, timeout)
+            frames = list(self.frames)
+            self.frames.clear()
+            return frames
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+
+class BroadcastHub:
+    # Jedes Event wird genau einmal serialisiert, SSE- und WebSocket-Frame teilen sich alle Clients
+    def __init__(self, replay=100):
+        self._lock = Lock()
+        self._replay = deque(maxlen=replay)
+        self._subscribers = set()
+        self._ids = itertools.count(1)
+
+    def publish(self, event):
+        payload = json.dumps(event.to_dict(), ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            event_id = next(self._ids)
+            frames = (event_id, b"id: %d\ndata: %s\n\n" % (event_id, payload), websocket_frame(payload))
+            self._replay.append(frames)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.push(frames)
+        metrics.incr("feed.events")
+
+    def subscribe(self, last_event_id=None):
+        # Späte Clients bekommen zuerst den Replay-Puffer (bei SSE ab Last-Event-ID)
+        with self._lock:
+            backlog = [frames for frames in self._replay if last_event_id is None or frames[0] > last_event_id]
+            subscriber = FeedSubscriber(backlog)
+            self._subscribers.add(subscriber)
+            metrics.set("feed.clients", len(self._subscribers))
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+            metrics.set("feed.clients", len(self._subscribers))
+
+    def close(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.close()
+
+
+FEED_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>TD2 Translator</title>
+<style>body{background:transparent;color:#fff;font:bold 16px Helvetica,sans-serif;text-shadow:1px 1px 2px #000}
+.fahrdienstleiter{color:#DF7676}.translated{color:orange}.swdr{color:green}.warning{color:red}.system{color:#9E9E9E}</style>
+</head><body><div id="log"></div><script>
+const lang = new URLSearchParams(location.search).get("lang");
+const log = document.getElementById("log");
+new EventSource("/events").onmessage = (msg) => {
+  const e = JSON.parse(msg.data);
+  const text = (lang && e.translations[lang]) || Object.values(e.translations)[0] || e.message;
+  const div = document.createElement("div");
+  div.className = e.kind;
+  div.textContent = e.kind === "warning" ? text : [e.time && "(" + e.time + ")", e.sender, text].filter(Boolean).join(" ");
+  log.appendChild(div);
+  while (log.children.length > 30) log.removeChild(log.firstChild);
+  window.scrollTo(0, document.body.scrollHeight);
+};
+</script></body></html>
+"""
+
+
+def start_feed_server(hub, host, port):
+    # Nur im Headless-Modus gebraucht, daher erst hier importiert
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+    import base64
+    import hashlib
+
+    class FeedRequestHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/events":
+                self.serve_events()
+            elif path == "/ws":
+                self.serve_websocket()
+            elif path == "/":
+                body = FEED_PAGE.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            else:
+                self.send_error(404)
+
+        def serve_events(self):
+            try:
+                last_event_id = int(self.headers.get("Last-Event-ID", ""))
+            except ValueError:
+                last_event_id = None
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            self.stream(hub.subscribe(last_event_id), 1, b": keepalive\n\n")
+
+        def serve_websocket(self):
+            key = self.headers.get("Sec-WebSocket-Key")
+            if not key or self.headers.get("Upgrade", "").lower() != "websocket":
+                self.send_error(400)
+                return
+            accept = base64.b64encode(hashlib.sha1((key + "258EAFA5-E914-47DA-95CA-C5AB0DC85B11").encode()).digest())
+            self.send_response(101, "Switching Protocols")
+            self.send_header("Upgrade", "websocket")
+            self.send_header("Connection", "Upgrade")
+            self.send_header("Sec-WebSocket-Accept", accept.decode())
+            self.end_headers()
+            self.stream(hub.subscribe(), 2, websocket_frame(b"", opcode=0x9))
+
+        def stream(self, subscriber, index, keepalive):
+            # index wählt den vorgefertigten Frame (1 = SSE, 2 = WebSocket), nichts wird pro Client serialisiert
+            self.close_connection = True
+            try:
+                while True:
+                    frames = subscriber.next_frames(timeout=15)
+                    if subscriber.closed:
+                        break
+                    self.wfile.write(b"".join(frame[index] for frame in frames) if frames else keepalive)
+                    self.wfile.flush()
+            except OSError:
+                pass
+            finally:
+                hub.unsubscribe(subscriber)
+
+    server = ThreadingHTTPServer((host, port), FeedRequestHandler)
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, name="Feed", daemon=True).start()
+    return server
+
+
+class HeadlessDaemon(QtCore.QObject):
+    # Log-Tailing und Übersetzung ohne Fenster, die Events gehen an den BroadcastHub
+    def __init__(self, directory_path, languages, service, hub, my_names=(), driver_warnings=True, poll_ms=1000,
+                 archive=None, parent=None):
+        super().__init__(parent)
+        self.directory_path = directory_path
+        self.archive = archive
+        self.languages = languages
+        self.service = service
+        self.hub = hub
+        self.my_names = my_names
+        self.driver_warnings = driver_warnings
+        self.poll_ms = poll_ms
+        self.filter_engine = load_ignore_list(resource_path(os.path.join('res', 'ignore_list.csv')))
+        self.engine = build_translation_engine()
+        # Ein Worker, damit die Events in Log-Reihenfolge veröffentlicht werden
+        self.pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Headless")
+        self.handlers = {}
+        self.known_logs = {}
+        self.monitor_timer = QtCore.QTimer(self)
+        self.monitor_timer.timeout.connect(self.scan_logs)
+        self.monitor_timer.start(10000)
+        self.resource_watcher = ResourceWatcher()
+        self.reload_timer = QtCore.QTimer(self)
+        self.reload_timer.timeout.connect(self.reload_changed_resources)
+        if config.getboolean('reload', 'enabled', fallback=True):
+            self.reload_timer.start(config.getint('reload', 'interval_ms', fallback=2000))
+        self.scan_logs(initial=True)
+
+    def reload_changed_resources(self):
+        changed = self.resource_watcher.changed()
+        if not changed:
+            return
+        filter_engine = reload_resources(changed, self.engine)
+        if filter_engine is not None:
+            self.filter_engine = filter_engine
+            for handler, timer in self.handlers.values():
+                handler.filter_engine = filter_engine
+        print(f"Reloaded {', '.join(sorted(changed))}", file=sys.stderr)
+
+    def scan_logs(self, initial=False):
+        log_files = [os.path.join(self.directory_path, f) for f in os.listdir(self.directory_path)
+                     if os.path.isfile(os.path.join(self.directory_path, f)) and "Log" in f]
+        if initial and log_files:
+            self.open_log(max(log_files, key=os.path.getmtime))
+        for log_file in log_files:
+            mtime = os.path.getmtime(log_file)
+            old_mtime = self.known_logs.get(log_file)
+            if log_file not in self.handlers and old_mtime is not None and mtime > old_mtime:
+                self.open_log(log_file)
+            self.known_logs[log_file] = mtime
+
+    def open_log(self, log_file_path):
+        handler = LogHandler(
+            log_file_path=log_file_path,
+            language_var=lambda: self.languages,
+            service_var=lambda: self.service,
+            filter_engine=self.filter_engine,
+            engine=self.engine,
+            enable_driver_warning=lambda: self.driver_warnings,
+            my_names=self.my_names
+        )
+        handler.setParent(self)
+        # Keine Warnsounds ohne Fenster, die Warnung kommt als Event
+        handler.play_warning_sound.disconnect()
+        handler.file.seek(0, os.SEEK_END)
+        handler.last_position = handler.file.tell()
+        log_name = os.path.basename(log_file_path)
+        handler.lines_translated.connect(lambda lines: self.pool.submit(self.publish_lines, handler, lines))
+        timer = QtCore.QTimer(self)
+        timer.timeout.connect(handler.check_new_lines)
+        timer.start(self.poll_ms)
+        self.handlers[log_file_path] = (handler, timer)
+        print(f"Following {log_name}", file=sys.stderr)
+
+    def publish_lines(self, handler, lines):
+        try:
+            events = handler.translate_events(lines)
+            if self.archive:
+                self.archive.append(events)
+            for event in events:
+                self.hub.publish(event)
+        except Exception as e:
+            print(f"Translation failed: {e}", file=sys.stderr)
+
+    def stop(self):
+        self.monitor_timer.stop()
+        self.reload_timer.stop()
+        for handler, timer in self.handlers.values():
+            timer.stop()
+            handler.close()
+        self.pool.shutdown(wait=True)
+
+
+def run_headless(argv):
+    import argparse
+    import signal
+    parser = argparse.ArgumentParser(description="Translate TD2 chat without a window and publish it as a local feed.")
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--logs", help="TD2 log directory (default: [headless] log_directory or the GUI setting)")
+    parser.add_argument("--languages", help="comma separated target languages")
+    parser.add_argument("--service", help="translation service")
+    parser.add_argument("--host", help="listen address (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, help="listen port (default 8765)")
+    args, _ = parser.parse_known_args(argv[1:])
+
+    app = QtCore.QCoreApplication(argv)
+    settings = SettingsStore()
+    directory_path = args.logs or config.get('headless', 'log_directory', fallback='') or settings.get("log_directory")
+    if not directory_path or not os.path.isdir(directory_path):
+        print("No TD2 log directory, use --logs or [headless] log_directory in config.cfg", file=sys.stderr)
+        settings.close()
+        return 2
+    languages = args.languages or config.get('headless', 'languages', fallback='')
+    if languages:
+        languages = [language.strip() for language in languages.split(',') if language.strip()]
+    else:
+        languages = [settings.get("language", "English")]
+        languages += [language for language in settings.get("extra_languages", []) if language not in languages]
+    service = args.service or config.get('headless', 'service', fallback='') or settings.get("service", "Deepl")
+    host = args.host or config.get('headless', 'host', fallback='127.0.0.1')
+    port = args.port or config.getint('headless', 'port', fallback=8765)
+
+    hub = BroadcastHub(replay=config.getint('headless', 'replay', fallback=100))
+    server = start_feed_server(hub, host, port)
+    archive = SessionArchive.new_session(new_session_name()) if config.getboolean('archive', 'enabled', fallback=True) else None
+    daemon = HeadlessDaemon(
+        directory_path, languages, service, hub,
+        my_names=App.parse_names(settings.get("my_names", "")),
+        driver_warnings=settings.get("driver_warnings", True),
+        poll_ms=config.getint('headless', 'poll_ms', fallback=1000),
+        archive=archive
+    )
+    print(f"Feed on http://{host}:{port}/ (SSE /events, WebSocket /ws), languages: {', '.join(languages)}", file=sys.stderr)
+    if service == LOCAL_SERVICE:
+        warm_up_local(languages)
+
+    # Qt blockiert Python-Signalhandler, der Timer gibt dem Interpreter regelmäßig die Kontrolle
+    signal.signal(signal.SIGINT, lambda *args: app.quit())
+    signal_timer = QtCore.QTimer()
+    signal_timer.timeout.connect(lambda: None)
+    signal_timer.start(500)
+    code = app.exec()
+
+    daemon.stop()
+    usage.flush()
+    if archive:
+        archive.close()
+    hub.close()
+    server.shutdown()
+    settings.close()
+    return code
 
-            cursor.insertText(line + "\n", fmt)
-            text_area.setTextCursor(cursor)
-        text_area.ensureCursorVisible()
-        if self.overlay_window and self.overlay_window.isVisible():
-            # nur den soeben eingefügten Bereich an das Overlay anhängen (mit Formatierung)
-            ins_cur = QtGui.QTextCursor(text_area.document())
-            ins_cur.setPosition(insert_start)
-            ins_cur.setPosition(cursor.position(), QtGui.QTextCursor.MoveMode.KeepAnchor)
-            fragment = QtGui.QTextDocumentFragment(ins_cur)
-
-            ov = self.overlay_window.text_edit
-            ov_cur = ov.textCursor()
-            ov_cur.movePosition(QtGui.QTextCursor.MoveOperation.End)
-            ov_cur.insertFragment(fragment)
-            ov.setTextCursor(ov_cur)
-            ov.ensureCursorVisible()
-
-
-        doc = text_area.document()
-        if doc.blockCount() > max_lines:
-            cursor = text_area.textCursor()
-            cursor.movePosition(QtGui.QTextCursor.MoveOperation.Start)
-            for _ in range(doc.blockCount() - max_lines):
-                cursor.select(QtGui.QTextCursor.SelectionType.LineUnderCursor)
-                cursor.removeSelectedText()
-                cursor.deleteChar()
-            cursor.movePosition(QtGui.QTextCursor.MoveOperation.End)
-            text_area.setTextCursor(cursor)
-            text_area.ensureCursorVisible()
-            if self.overlay_window and self.overlay_window.isVisible():
-                self.start_overlay_sync(text_area)
 
 if __name__ == "__main__":
+    # Für den Engine-Prozess in der PyInstaller-Exe
+    import multiprocessing
+    multiprocessing.freeze_support()
+    if "--headless" in sys.argv:
+        sys.exit(run_headless(sys.argv))
     app = QtWidgets.QApplication(sys.argv)
+    startup_profile.mark("QApplication created")
     main_win = App()
     main_win.show()
+    startup_profile.mark("window shown")
     sys.exit(app.exec())
 